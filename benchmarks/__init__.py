@@ -0,0 +1,6 @@
+"""
+Benchmark harness for CPT Inspector.
+
+Local stand-ins for Ollama and an MCP server plus a load generator, so the
+application's own overhead can be measured without a GPU or live backends.
+"""
@@ -0,0 +1,92 @@
+"""
+Fake MCP server for benchmarks.
+
+Serves a few CPT-style tools over streamable HTTP with configurable latency
+and result size.
+
+    python -m benchmarks.fake_mcp --port 3100 --latency 0.05 --payload-bytes 65536
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from functools import lru_cache
+
+from mcp.server.fastmcp import FastMCP
+
+settings = {"latency": 0.05, "jitter": 0.0, "payload_bytes": 2048}
+
+
+@lru_cache(maxsize=16)
+def _payload(kind: str, version: str, size: int) -> str:
+    """Build a JSON array of result rows roughly ``size`` bytes long."""
+    rows = []
+    length = 2
+    i = 0
+    while length < size:
+        row = {
+            "uuid": f"{kind}-{version}-{i:06d}",
+            "version": version,
+            "workload": ("cluster-density", "node-density", "ingress-perf")[i % 3],
+            "nodes": 24 + i % 96,
+            "p99_latency_ms": round(100 + (i * 37) % 900 + (i % 7) / 10, 1),
+            "throughput": round(1000 + (i * 53) % 5000 + (i % 3) / 10, 1),
+            "status": "pass" if i % 11 else "fail",
+        }
+        rows.append(row)
+        length += len(json.dumps(row)) + 2
+        i += 1
+    return json.dumps(rows)
+
+
+async def _work() -> None:
+    jitter = random.uniform(-settings["jitter"], settings["jitter"])
+    await asyncio.sleep(max(settings["latency"] + jitter, 0))
+
+
+def build_server(host: str, port: int) -> FastMCP:
+    """Create the fake server with its tools registered."""
+    server = FastMCP("cpt-bench", host=host, port=port, log_level="WARNING")
+
+    @server.tool()
+    async def get_results(version: str) -> str:
+        """Fetch performance test results for an OpenShift version."""
+        await _work()
+        return _payload("results", version, settings["payload_bytes"])
+
+    @server.tool()
+    async def get_regressions(version: str) -> str:
+        """List detected performance regressions for an OpenShift version."""
+        await _work()
+        return _payload("regressions", version, settings["payload_bytes"])
+
+    @server.tool()
+    async def list_runs(limit: int) -> str:
+        """List the most recent benchmark runs."""
+        await _work()
+        return _payload("runs", str(limit), settings["payload_bytes"])
+
+    @server.resource("cpt://summary")
+    def summary() -> str:
+        """Summary of the latest results."""
+        return _payload("summary", "latest", settings["payload_bytes"])
+
+    return server
+
+
+def main() -> None:
+    """Run the fake server."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3100)
+    parser.add_argument("--latency", type=float, default=settings["latency"], help="seconds per tool call")
+    parser.add_argument("--jitter", type=float, default=settings["jitter"], help="+/- seconds of random latency")
+    parser.add_argument("--payload-bytes", type=int, default=settings["payload_bytes"], help="approximate result size")
+    args = parser.parse_args()
+    settings.update(latency=args.latency, jitter=args.jitter, payload_bytes=args.payload_bytes)
+    build_server(args.host, args.port).run(transport="streamable-http")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Fake Ollama server for benchmarks.
+
+Implements the parts of the Ollama HTTP API the application uses, streaming
+synthetic tokens at a configurable rate and issuing scripted tool calls.
+
+    python -m benchmarks.fake_ollama --port 11435 --tool-rounds 2 --tools-per-round 3
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+app = FastAPI(title="Fake Ollama")
+
+# Behaviour knobs, overridden from the command line
+settings: Dict[str, Any] = {
+    "tokens": 64,
+    "token_rate": 2000.0,
+    "latency": 0.02,
+    "tool_rounds": 0,
+    "tools_per_round": 1,
+}
+
+_counter = itertools.count()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _tool_rounds_done(messages: List[Dict[str, Any]]) -> int:
+    """Count assistant tool-call rounds since the last user message."""
+    rounds = 0
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            break
+        if message.get("role") == "assistant" and message.get("tool_calls"):
+            rounds += 1
+    return rounds
+
+
+def _arguments(tool: Dict[str, Any]) -> Dict[str, Any]:
+    """Build plausible arguments for a tool's required parameters."""
+    schema = tool.get("function", {}).get("parameters") or {}
+    properties = schema.get("properties") or {}
+    arguments: Dict[str, Any] = {}
+    for name in schema.get("required") or []:
+        kind = (properties.get(name) or {}).get("type")
+        if kind == "integer":
+            arguments[name] = next(_counter) % 100
+        elif kind == "number":
+            arguments[name] = 1.0
+        elif kind == "boolean":
+            arguments[name] = True
+        else:
+            arguments[name] = f"4.{next(_counter) % 20}"
+    return arguments
+
+
+def _tool_calls(messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return the scripted tool calls for this round, or none once the script is done."""
+    done = _tool_rounds_done(messages)
+    if not tools or done >= settings["tool_rounds"]:
+        return []
+    calls = []
+    for i in range(settings["tools_per_round"]):
+        tool = tools[(done * settings["tools_per_round"] + i) % len(tools)]
+        calls.append({"function": {"name": tool["function"]["name"], "arguments": _arguments(tool)}})
+    return calls
+
+
+def _prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+    return sum(len(str(message.get("content") or "")) for message in messages) // 4 + 1
+
+
+@app.get("/", response_class=PlainTextResponse)
+async def root():
+    """Answer liveness probes like the real server."""
+    return "Ollama is running"
+
+
+@app.get("/api/tags")
+async def tags():
+    """List the single fake model."""
+    return {"models": [{"name": "fake", "model": "fake", "size": 0}]}
+
+
+@app.get("/api/version")
+async def version():
+    """Report a version string."""
+    return {"version": "0.0.0-fake"}
+
+
+@app.post("/api/embed")
+async def embed(request: Request):
+    """Return deterministic bag-of-words embeddings."""
+    body = await request.json()
+    texts = body.get("input") or []
+    if isinstance(texts, str):
+        texts = [texts]
+    embeddings = []
+    for text in texts:
+        vector = [0.0] * 64
+        for word in text.lower().replace("_", " ").split():
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % 64] += 1.0
+        embeddings.append(vector)
+    return {"model": body.get("model", "fake"), "embeddings": embeddings}
+
+
+@app.post("/api/generate")
+async def generate(request: Request):
+    """Answer the empty-prompt requests used to load a model."""
+    body = await request.json()
+    await asyncio.sleep(settings["latency"])
+    return {
+        "model": body.get("model", "fake"),
+        "created_at": _now(),
+        "response": "",
+        "done": True,
+        "done_reason": "load",
+    }
+
+
+@app.post("/api/chat")
+async def chat(request: Request):
+    """Stream synthetic tokens or scripted tool calls for a chat request."""
+    body = await request.json()
+    model = body.get("model", "fake")
+    messages = body.get("messages") or []
+    tool_calls = _tool_calls(messages, body.get("tools") or [])
+    tokens = 0 if tool_calls else settings["tokens"]
+    prompt_tokens = _prompt_tokens(messages)
+
+    def final(content: str, eval_ns: int) -> Dict[str, Any]:
+        message: Dict[str, Any] = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return {
+            "model": model,
+            "created_at": _now(),
+            "message": message,
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": eval_ns + int(settings["latency"] * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(settings["latency"] * 1e9),
+            "eval_count": max(tokens, 1),
+            "eval_duration": eval_ns,
+        }
+
+    if not body.get("stream", True):
+        start = time.perf_counter_ns()
+        await asyncio.sleep(settings["latency"] + (tokens / settings["token_rate"] if settings["token_rate"] else 0))
+        return final("tok " * tokens, time.perf_counter_ns() - start)
+
+    async def stream():
+        start = time.perf_counter_ns()
+        await asyncio.sleep(settings["latency"])
+        delay = 1 / settings["token_rate"] if settings["token_rate"] else 0
+        for _ in range(tokens):
+            if delay:
+                await asyncio.sleep(delay)
+            yield json.dumps({
+                "model": model,
+                "created_at": _now(),
+                "message": {"role": "assistant", "content": "tok "},
+                "done": False,
+            }) + "\n"
+        yield json.dumps(final("", time.perf_counter_ns() - start)) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def main() -> None:
+    """Run the fake server."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--tokens", type=int, default=settings["tokens"], help="tokens per final answer")
+    parser.add_argument("--token-rate", type=float, default=settings["token_rate"], help="tokens per second, 0 for no delay")
+    parser.add_argument("--latency", type=float, default=settings["latency"], help="seconds before the first token")
+    parser.add_argument("--tool-rounds", type=int, default=settings["tool_rounds"], help="tool-call rounds per turn")
+    parser.add_argument("--tools-per-round", type=int, default=settings["tools_per_round"], help="parallel tool calls per round")
+    args = parser.parse_args()
+    settings.update(
+        tokens=args.tokens,
+        token_rate=args.token_rate,
+        latency=args.latency,
+        tool_rounds=args.tool_rounds,
+        tools_per_round=args.tools_per_round,
+    )
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Load generator for CPT Inspector.
+
+Drives ``/api/chat`` at a fixed concurrency and reports latency percentiles,
+throughput and, when the server's PID is known, its resident memory.
+
+    python -m benchmarks.loadgen --url http://localhost:8000 --concurrency 16 --requests 500
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the nearest-rank percentile of ``values``."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    """Return a process's resident set size in MiB, or None if it cannot be read."""
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+class MemorySampler:
+    """Samples a process's RSS in the background and tracks the peak."""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.2):
+        """Initialize the sampler; with no ``pid`` it records nothing."""
+        self.pid = pid
+        self.interval = interval
+        self.start_mb: Optional[float] = None
+        self.peak_mb: Optional[float] = None
+        self.end_mb: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _sample(self) -> Optional[float]:
+        rss = read_rss_mb(self.pid) if self.pid else None
+        if rss is not None:
+            self.peak_mb = max(self.peak_mb or 0.0, rss)
+        return rss
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self._sample()
+
+    def start(self) -> None:
+        """Record the starting RSS and begin sampling."""
+        self.start_mb = self._sample()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling and record the final RSS."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.end_mb = self._sample()
+
+    def report(self) -> Dict[str, Optional[float]]:
+        """Return start, peak and end RSS in MiB."""
+        return {
+            "start": round(self.start_mb, 1) if self.start_mb is not None else None,
+            "peak": round(self.peak_mb, 1) if self.peak_mb is not None else None,
+            "end": round(self.end_mb, 1) if self.end_mb is not None else None,
+        }
+
+
+async def run_load(
+    url: str,
+    concurrency: int = 8,
+    requests: int = 200,
+    turns_per_session: int = 1,
+    prompt: str = "How did cluster-density perform in 4.19?",
+    timeout: float = 300.0,
+    pid: Optional[int] = None,
+    warmup: int = 0,
+) -> Dict[str, Any]:
+    """Send ``requests`` chat turns from ``concurrency`` workers and summarize the results.
+
+    Each worker keeps its session for ``turns_per_session`` turns, so long
+    sessions exercise history handling and context trimming.
+    """
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    remaining = requests
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        async def turn(session_id: Optional[str]) -> Optional[str]:
+            data = {"prompt": prompt}
+            if session_id:
+                data["session_id"] = session_id
+            start = time.perf_counter()
+            try:
+                response = await client.post("/api/chat", data=data)
+                body = response.json() if response.status_code == 200 else {}
+                error = None
+                if response.status_code != 200:
+                    error = f"HTTP {response.status_code}"
+                elif body.get("error") or str(body.get("response", "")).startswith("Error:"):
+                    error = str(body.get("error") or body.get("response"))[:80]
+            except (httpx.HTTPError, ValueError) as e:
+                body, error = {}, type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            if error:
+                errors[error] = errors.get(error, 0) + 1
+            return body.get("session_id")
+
+        async def worker() -> None:
+            nonlocal remaining
+            session_id = None
+            turns = 0
+            while remaining > 0:
+                remaining -= 1
+                if turns >= turns_per_session:
+                    session_id, turns = None, 0
+                session_id = await turn(session_id) or session_id
+                turns += 1
+
+        for _ in range(warmup):
+            await turn(None)
+        latencies.clear()
+        errors.clear()
+
+        sampler = MemorySampler(pid)
+        sampler.start()
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        await sampler.stop()
+
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "turns_per_session": turns_per_session,
+        "errors": sum(errors.values()),
+        "error_kinds": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "p99": round(percentile(latencies, 99) * 1000, 1),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+            "max": round(max(latencies, default=0) * 1000, 1),
+        },
+        "rss_mb": sampler.report(),
+    }
+
+
+def format_report(name: str, result: Dict[str, Any]) -> str:
+    """Render one result as a single human-readable line."""
+    latency = result["latency_ms"]
+    rss = result["rss_mb"]
+    memory = f" rss={rss['start']}->{rss['end']}MiB (peak {rss['peak']})" if rss["peak"] is not None else ""
+    return (
+        f"{name:<14} n={result['requests']:<5} c={result['concurrency']:<3} "
+        f"rps={result['throughput_rps']:<8} p50={latency['p50']}ms p95={latency['p95']}ms "
+        f"p99={latency['p99']}ms errors={result['errors']}{memory}"
+    )
+
+
+def main() -> None:
+    """Run the load generator against an already running server."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--turns-per-session", type=int, default=1)
+    parser.add_argument("--prompt", default="How did cluster-density perform in 4.19?")
+    parser.add_argument("--warmup", type=int, default=0, help="sequential requests excluded from the results")
+    parser.add_argument("--pid", type=int, help="server process to sample memory from")
+    parser.add_argument("--json", action="store_true", help="print the full result as JSON")
+    args = parser.parse_args()
+    result = asyncio.run(run_load(
+        args.url,
+        concurrency=args.concurrency,
+        requests=args.requests,
+        turns_per_session=args.turns_per_session,
+        prompt=args.prompt,
+        pid=args.pid,
+        warmup=args.warmup,
+    ))
+    print(json.dumps(result, indent=2) if args.json else format_report("load", result))
+
+
+if __name__ == "__main__":
+    main()
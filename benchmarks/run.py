@@ -0,0 +1,178 @@
+"""
+Benchmark scenario runner for CPT Inspector.
+
+Starts the fake Ollama and MCP servers and the application itself for each
+scenario, drives load against it and prints one result line per scenario.
+
+    python -m benchmarks.run --scenario all --concurrency 16 --requests 300 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.loadgen import format_report, run_load
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "simple": {
+        "description": "Plain answers, no tool calls",
+        "ollama": {"tool_rounds": 0},
+        "mcp": {},
+    },
+    "multi_tool": {
+        "description": "Two rounds of three parallel tool calls per turn",
+        "ollama": {"tool_rounds": 2, "tools_per_round": 3},
+        "mcp": {"latency": 0.05, "payload_bytes": 4096},
+    },
+    "long_session": {
+        "description": "Twenty-five turns per session with one tool call each",
+        "ollama": {"tool_rounds": 1, "tools_per_round": 1},
+        "mcp": {"payload_bytes": 8192},
+        "turns_per_session": 25,
+    },
+    "large_output": {
+        "description": "Two tool calls per turn returning 512 KiB each",
+        "ollama": {"tool_rounds": 1, "tools_per_round": 2},
+        "mcp": {"payload_bytes": 512 * 1024},
+    },
+}
+
+
+def free_port() -> int:
+    """Return a TCP port that is currently free on localhost."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _flags(options: Dict[str, Any]) -> List[str]:
+    args = []
+    for key, value in options.items():
+        args.extend([f"--{key.replace('_', '-')}", str(value)])
+    return args
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    """Poll ``url`` until it answers, failing early if the process exits."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process for {url} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def app_config(ollama_port: int, mcp_port: int, overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the application config pointing at the fake backends."""
+    config: Dict[str, Any] = {
+        "ollama": {"url": f"http://127.0.0.1:{ollama_port}", "model": "fake"},
+        "mcp_servers": [{
+            "name": "bench",
+            "url": f"http://127.0.0.1:{mcp_port}/mcp",
+            "enabled": True,
+            "pool_size": 4,
+        }],
+        "logging": {"level": "WARNING", "file": None},
+        "health_check": {"interval": 30, "timeout": 5},
+        "session_store": {"backend": "memory"},
+    }
+    for section, values in overrides.items():
+        if isinstance(values, dict) and isinstance(config.get(section), dict):
+            config[section].update(values)
+        else:
+            config[section] = values
+    return config
+
+
+def run_scenario(name: str, scenario: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    """Start the fakes and the app for one scenario, run the load and tear everything down."""
+    ollama_port, mcp_port, app_port = free_port(), free_port(), free_port()
+    processes: List[subprocess.Popen] = []
+    with tempfile.TemporaryDirectory(prefix="cpt-bench-") as workdir:
+        config = app_config(ollama_port, mcp_port, scenario.get("config", {}))
+        with open(os.path.join(workdir, "config.json"), "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+        os.symlink(os.path.join(ROOT, "templates"), os.path.join(workdir, "templates"))
+        output = None if args.verbose else subprocess.DEVNULL
+        try:
+            mcp = subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.fake_mcp", "--port", str(mcp_port)] + _flags(scenario.get("mcp", {})),
+                cwd=ROOT, stdout=output, stderr=output,
+            )
+            processes.append(mcp)
+            ollama = subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.fake_ollama", "--port", str(ollama_port)] + _flags(scenario.get("ollama", {})),
+                cwd=ROOT, stdout=output, stderr=output,
+            )
+            processes.append(ollama)
+            wait_until_ready(f"http://127.0.0.1:{mcp_port}/mcp", mcp)
+            wait_until_ready(f"http://127.0.0.1:{ollama_port}/", ollama)
+            app = subprocess.Popen(
+                [
+                    sys.executable, "-m", "uvicorn", "main:app",
+                    "--app-dir", ROOT, "--host", "127.0.0.1", "--port", str(app_port), "--log-level", "warning",
+                ],
+                cwd=workdir, stdout=output, stderr=output,
+            )
+            processes.append(app)
+            wait_until_ready(f"http://127.0.0.1:{app_port}/api/config", app)
+            result = asyncio.run(run_load(
+                f"http://127.0.0.1:{app_port}",
+                concurrency=args.concurrency,
+                requests=args.requests,
+                turns_per_session=scenario.get("turns_per_session", 1),
+                pid=app.pid,
+                warmup=args.warmup,
+            ))
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+            for process in processes:
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+    result["scenario"] = name
+    result["description"] = scenario["description"]
+    return result
+
+
+def main() -> None:
+    """Run the selected benchmark scenarios."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=["all"] + list(SCENARIOS), default="all")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=3, help="sequential requests excluded from the results")
+    parser.add_argument("--output", help="write all results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="show output from the servers")
+    args = parser.parse_args()
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = []
+    for name in names:
+        result = run_scenario(name, SCENARIOS[name], args)
+        results.append(result)
+        print(format_report(name, result), flush=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
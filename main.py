@@ -2,36 +2,41 @@
 CPT Inspector - A chatbot application with Ollama and MCP integration.
 """
 
+import asyncio
 import json
 import logging
 import os
+import time
 import uuid
+from contextlib import aclosing, asynccontextmanager
 from datetime import datetime
+from typing import Callable, Optional
 
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 
+from src.admission import AdmissionController, AdmissionRejected
+from src.config_watcher import ConfigWatcher
+from src.health import HealthMonitor
+from src.jobs import FINISHED_STATUSES, JobRunner, JobStore
 from src.llm_client import LLMClientFactory
+from src.logging_setup import Payload, setup_logging
 from src.mcp_client import MCPClient
-
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/app.log'),
-        logging.StreamHandler()
-    ]
-)
+from src.metrics import ACTIVE_SESSIONS, CHAT_REQUEST_SECONDS, INFLIGHT_REQUESTS, registry
+from src.resource_cache import CachedPayload
+from src.result_cache import ToolResultCache
+from src.session_store import SessionStoreFactory
+from src.tracing import tracer
 
 logger = logging.getLogger("cpt-inspector")
-logger.setLevel(logging.DEBUG)
 
 # Load configuration
+CONFIG_PATH = "config.json"
+
 def load_config():
     """Load configuration from config.json file."""
-    config_path = "config.json"
+    config_path = CONFIG_PATH
     if not os.path.exists(config_path):
         logger.warning("Config file not found, creating default config")
         default_config = {
@@ -54,10 +59,6 @@ def load_config():
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
             config_data = json.load(f)
-        logger.info("Configuration loaded successfully")
-        logger.info("Ollama URL: %s", config_data.get('ollama', {}).get('url'))
-        logger.info("Ollama Model: %s", config_data.get('ollama', {}).get('model'))
-        logger.info("MCP Servers: %s", config_data.get('mcp_servers', []))
         return config_data
     except json.JSONDecodeError as e:
         logger.error("Error loading config: %s", e)
@@ -65,8 +66,31 @@ def load_config():
 
 config = load_config()
 
+# Configure logging; handlers run on a background thread fed by a queue
+log_listener = setup_logging(config.get("logging", {}))
+logger.info("Configuration loaded successfully")
+logger.info("Ollama URL: %s", config.get('ollama', {}).get('url'))
+logger.info("Ollama Model: %s", config.get('ollama', {}).get('model'))
+logger.info("MCP Servers: %s", config.get('mcp_servers', []))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up backends before serving requests and release them on shutdown."""
+    await warm_up()
+    health_monitor.start()
+    config_watcher.start()
+    await job_runner.start()
+    try:
+        yield
+    finally:
+        await job_runner.stop()
+        await config_watcher.stop()
+        await health_monitor.stop()
+        await asyncio.gather(*(client.close() for client in mcp_servers.values()), return_exceptions=True)
+        log_listener.stop()
+
 # Initialize FastAPI app
-app = FastAPI(title="CPT Inspector", version="1.0.0")
+app = FastAPI(title="CPT Inspector", version="1.0.0", lifespan=lifespan)
 templates = Jinja2Templates(directory="templates")
 
 # Initialize LLM client
@@ -74,25 +98,197 @@ llm_factory = LLMClientFactory()
 llm_client = llm_factory.create_client("ollama", config.get("ollama", {}))
 
 # Initialize MCP servers
+cache_config = config.get("tool_result_cache", {})
+tool_result_cache = ToolResultCache(
+    max_bytes=cache_config.get("max_bytes", 64 * 1024 * 1024),
+    disk_path=cache_config.get("disk_path"),
+    disk_max_bytes=cache_config.get("disk_max_bytes", 256 * 1024 * 1024),
+)
+
+def create_mcp_client(mcp_server: dict) -> MCPClient:
+    """Build the client for one entry of the mcp_servers configuration."""
+    return MCPClient(
+        mcp_server.get("url"),
+        pool_size=mcp_server.get("pool_size", 2),
+        connect_timeout=mcp_server.get("connect_timeout", 10),
+        result_cache=tool_result_cache,
+        cache_ttls=mcp_server.get("cache_ttls", {}),
+        resource_cache_ttl=mcp_server.get("resource_cache_ttl", 60),
+        resource_cache_bytes=mcp_server.get("resource_cache_bytes", 16 * 1024 * 1024),
+        name=mcp_server.get("name", "unknown"),
+        coalesce_calls=mcp_server.get("coalesce_calls", True),
+    )
+
+def enabled_mcp_servers(server_configs: list) -> dict:
+    """Map the names of enabled MCP servers to their configuration entries."""
+    return {server.get("name", "unknown"): server for server in server_configs if server.get("enabled", True)}
+
 mcp_servers = {}
-for mcp_server in config.get("mcp_servers", []):
+# Server name -> configuration entry its running client was built from
+mcp_server_configs = {}
+for server_name, mcp_server in enabled_mcp_servers(config.get("mcp_servers", [])).items():
     logger.info("MCP server: %s", mcp_server)
-    if not mcp_server.get("enabled", True):
-        continue
     try:
-        mcp_client = MCPClient(mcp_server.get("url"))
-        server_name = mcp_server.get("name", "unknown")
-        mcp_servers[server_name] = mcp_client
+        mcp_servers[server_name] = create_mcp_client(mcp_server)
+        mcp_server_configs[server_name] = mcp_server
         logger.info(
             "MCP server '%s' initialized at %s", server_name, mcp_server.get("url")
         )
     except Exception as e:
         logger.error(
-            "Failed to initialize MCP server '%s': %s", mcp_server.get("name", "unknown"), e
+            "Failed to initialize MCP server '%s': %s", server_name, e
         )
 
+# Background MCP health checks
+health_config = config.get("health_check", {})
+health_monitor = HealthMonitor(
+    mcp_servers,
+    interval=health_config.get("interval", 30),
+    timeout=health_config.get("timeout", 5),
+)
+
+async def prefetch_tools() -> int:
+    """Fill the tool catalog from every healthy MCP server."""
+    tools, _ = await llm_client.list_tools(health_monitor.healthy_servers())
+    return len(tools)
+
+async def warm_up() -> None:
+    """Connect MCP servers, fetch their tool catalogs and load the model, all concurrently."""
+    startup_config = config.get("startup", {})
+    timeout = startup_config.get("warmup_timeout", 60)
+    start = time.perf_counter()
+
+    async def warm_up_mcp() -> None:
+        await health_monitor.probe_all()
+        tools_count = await prefetch_tools()
+        logger.info("Prefetched %d tools from %d MCP servers", tools_count, len(mcp_servers))
+
+    steps = [warm_up_mcp()]
+    if startup_config.get("preload_model", True):
+        steps.append(llm_client.preload())
+    try:
+        await asyncio.wait_for(asyncio.gather(*steps), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Warm-up did not finish within %ss; serving anyway", timeout)
+    logger.info("Warm-up finished in %.1fs", time.perf_counter() - start)
+
+async def apply_config(new_config: dict) -> None:
+    """Add, replace and remove MCP servers to match a reloaded configuration."""
+    wanted = enabled_mcp_servers(new_config.get("mcp_servers", []))
+    config["mcp_servers"] = new_config.get("mcp_servers", [])
+    removed = [name for name, server in mcp_server_configs.items() if wanted.get(name) != server]
+    added = {name: server for name, server in wanted.items() if mcp_server_configs.get(name) != server}
+    if not removed and not added:
+        return
+
+    # Connect new clients while the ones they replace keep serving
+    clients = {}
+    for name, server in added.items():
+        try:
+            clients[name] = create_mcp_client(server)
+        except Exception as e:
+            logger.error("Failed to initialize MCP server '%s': %s", name, e)
+    await asyncio.gather(*(health_monitor.probe(name, client) for name, client in clients.items()))
+
+    retired = []
+    for name in removed:
+        retired.append(mcp_servers.pop(name))
+        del mcp_server_configs[name]
+        llm_client.tool_catalog.forget(name)
+        if name not in clients:
+            health_monitor.forget(name)
+    for name, client in clients.items():
+        mcp_servers[name] = client
+        mcp_server_configs[name] = added[name]
+    await prefetch_tools()
+    await asyncio.gather(*(client.close() for client in retired), return_exceptions=True)
+    logger.info(
+        "MCP servers reloaded: added %s, replaced %s, removed %s",
+        sorted(name for name in clients if name not in removed) or "none",
+        sorted(name for name in clients if name in removed) or "none",
+        sorted(name for name in removed if name not in clients) or "none",
+    )
+
+# Hot reload of MCP servers from the config file
+config_watcher = ConfigWatcher(
+    CONFIG_PATH,
+    apply_config,
+    interval=config.get("config_watch", {}).get("interval", 5),
+)
+
 # Chat sessions storage
-chat_sessions = {}
+session_store = SessionStoreFactory.create_store(config.get("session_store", {}))
+
+# Admission control for chat turns
+admission_config = config.get("admission", {})
+admission = AdmissionController(
+    max_concurrent=admission_config.get("max_concurrent", 4),
+    max_queue=admission_config.get("max_queue", 64),
+    max_queue_per_session=admission_config.get("max_queue_per_session", 4),
+    queue_timeout=admission_config.get("queue_timeout", 120),
+)
+
+def admission_rejected_response(error: AdmissionRejected) -> JSONResponse:
+    """Build a 429/503 response telling the client when to retry."""
+    return JSONResponse(
+        {"error": str(error), "retry_after": error.retry_after},
+        status_code=error.status_code,
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+# Per-turn execution traces
+tracing_config = config.get("tracing", {})
+tracer.configure(
+    max_traces=tracing_config.get("max_traces", 200),
+    otlp_file=tracing_config.get("otlp_file"),
+)
+
+async def admit_job_item(session_id: str):
+    """Wait for an admission slot for a batch item, backing off while the queue is full."""
+    while True:
+        try:
+            waiter = admission.enqueue(session_id)
+        except AdmissionRejected as e:
+            await asyncio.sleep(e.retry_after)
+            continue
+        try:
+            await admission.wait(waiter)
+            return waiter
+        except AdmissionRejected as e:
+            await asyncio.sleep(e.retry_after)
+        except BaseException:
+            admission.leave(waiter)
+            raise
+
+async def run_job_item(job_id: str, index: int, prompt: str) -> str:
+    """Answer one batch job prompt as a fresh single-turn conversation."""
+    # Each item is its own session, so items of one job are not serialized by admission
+    session_id = f"{job_id}-{index}"
+    waiter = await admit_job_item(session_id)
+    try:
+        return await asyncio.wait_for(
+            llm_client.chat([{"role": "user", "content": prompt}], health_monitor.healthy_servers(), session_id),
+            llm_client.turn_timeout or None,
+        )
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Turn exceeded its {llm_client.turn_timeout}s time limit")
+    finally:
+        admission.leave(waiter)
+        llm_client.pool.forget(session_id)
+
+# Batch jobs
+jobs_config = config.get("jobs", {})
+job_store = JobStore(
+    path=jobs_config.get("path", "data/jobs.db"),
+    ttl=jobs_config.get("ttl", 604800),
+    lease=jobs_config.get("lease", 60),
+)
+job_runner = JobRunner(
+    job_store,
+    run_job_item,
+    workers=jobs_config.get("max_concurrent", 2),
+    max_items=jobs_config.get("max_items", 1000),
+)
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
@@ -106,10 +302,106 @@ async def index(request: Request):
         },
     )
 
+def close_interrupted_turn(messages: list, turn_start: int, note: str) -> str:
+    """Take the partial answer an interrupted turn left in ``messages`` and return it with ``note`` appended."""
+    partial = ""
+    if len(messages) > turn_start and messages[-1].get("interrupted"):
+        partial = messages.pop()["content"]
+    return f"{partial}\n\n[{note}]" if partial else f"[{note}]"
+
+async def generate_response(messages: list, session_id: str, emit: Optional[Callable[[dict], None]]) -> str:
+    """Run the tool loop, passing streamed events to ``emit`` if given."""
+    if emit is None:
+        return await llm_client.chat(messages, health_monitor.healthy_servers(), session_id)
+    response = ""
+    async with aclosing(llm_client.chat_stream(messages, health_monitor.healthy_servers(), session_id)) as events:
+        async for event in events:
+            if event["type"] == "done":
+                response = event["content"]
+                continue
+            emit(event)
+    return response
+
+async def run_chat_turn(session_id: str, message: str, endpoint: str, emit: Optional[Callable[[dict], None]] = None) -> str:
+    """Run one chat turn and save it to the session, even if it is cut short.
+
+    The turn stops at the ``turn_timeout`` deadline. If it is cancelled
+    because the client went away, the tool exchanges and partial answer
+    it produced are still saved, marked as interrupted.
+    """
+    # Another worker may be running a turn for this session; wait for it
+    async with session_store.lease(session_id):
+        await session_store.append(session_id, [{
+            "role": "user",
+            "content": message,
+            "timestamp": datetime.now().isoformat(),
+        }])
+        messages = await session_store.get(session_id) or []
+        turn_start = len(messages)
+
+        with tracer.trace("chat_turn", session_id=session_id, endpoint=endpoint, prompt_chars=len(message)) as turn:
+            response = ""
+            interrupted = None
+            try:
+                try:
+                    response = await asyncio.wait_for(
+                        generate_response(messages, session_id, emit), llm_client.turn_timeout or None
+                    )
+                    logger.debug("LLM response: %s", Payload(response))
+                except asyncio.TimeoutError:
+                    logger.warning("Turn for session %s exceeded its %ss deadline", session_id, llm_client.turn_timeout)
+                    interrupted = "deadline"
+                    response = close_interrupted_turn(
+                        messages, turn_start, f"Stopped: the turn exceeded its {llm_client.turn_timeout}s time limit"
+                    )
+                    turn.error = f"deadline of {llm_client.turn_timeout}s exceeded"
+                except Exception as e:
+                    logger.error("LLM error: %s", e)
+                    response = f"Error: {str(e)}"
+                    turn.error = str(e)
+            except asyncio.CancelledError:
+                logger.warning("Client disconnected; cancelled the turn for session %s", session_id)
+                interrupted = "disconnected"
+                response = close_interrupted_turn(messages, turn_start, "Interrupted: the client disconnected")
+                raise
+            finally:
+                # Persist tool exchanges and the assistant response
+                assistant = {
+                    "role": "assistant",
+                    "content": response,
+                    "timestamp": datetime.now().isoformat(),
+                }
+                if interrupted:
+                    assistant["interrupted"] = interrupted
+                with tracer.span("session_store.append"):
+                    await session_store.append(session_id, messages[turn_start:] + [assistant])
+                turn.set(response_chars=len(response), interrupted=interrupted)
+        return response
+
+async def cancel_on_disconnect(request: Request, task: asyncio.Task):
+    """Return the task's result, cancelling the task if the client disconnects first.
+
+    Raises asyncio.CancelledError after a cancelled task has finished cleaning up.
+    """
+    async def disconnected() -> None:
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+
+    watcher = asyncio.create_task(disconnected())
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    return task.result()
+
 @app.post("/api/chat")
 async def chat_endpoint(request: Request):
     """Handle chat requests."""
-    import asyncio
+    start = time.perf_counter()
+    INFLIGHT_REQUESTS.inc(endpoint="chat")
     try:
         form_data = await request.form()
         message = form_data.get("prompt", "")
@@ -118,39 +410,31 @@ async def chat_endpoint(request: Request):
         if not session_id:
             session_id = str(uuid.uuid4())
 
-        if session_id not in chat_sessions:
-            chat_sessions[session_id] = []
-
-        # Add user message to session
-        chat_sessions[session_id].append({
-            "role": "user",
-            "content": message,
-            "timestamp": datetime.now().isoformat(),
-        })
-
-        logger.info("Processing chat request for session %s", session_id)
-        logger.info("User message: %s", message)
-
-        # Get response from LLM
+        # Wait for an admission slot; this also serializes turns per session
         try:
-            response = await llm_client.chat(chat_sessions[session_id], mcp_servers)
-            logger.info("LLM response: %s", response)
-        except Exception as e:
-            logger.error("LLM error: %s", e)
-            response = f"Error: {str(e)}"
+            waiter = admission.enqueue(session_id)
+        except AdmissionRejected as e:
+            return admission_rejected_response(e)
+        async def admitted_turn() -> str:
+            await admission.wait(waiter)
+            logger.info("Processing chat request for session %s", session_id)
+            logger.info("User message: %s", Payload(message))
+            return await run_chat_turn(session_id, message, "chat")
 
-        # Add assistant response to session
-        chat_sessions[session_id].append({
-            "role": "assistant",
-            "content": response,
-            "timestamp": datetime.now().isoformat(),
-        })
-
-        return {
-            "response": response,
-            "session_id": session_id,
-            "timestamp": datetime.now().isoformat(),
-        }
+        try:
+            # Queueing and the turn run in one task so a disconnect stops either
+            try:
+                response = await cancel_on_disconnect(request, asyncio.create_task(admitted_turn()))
+            except AdmissionRejected as e:
+                return admission_rejected_response(e)
+
+            return {
+                "response": response,
+                "session_id": session_id,
+                "timestamp": datetime.now().isoformat(),
+            }
+        finally:
+            admission.leave(waiter)
 
     except (asyncio.CancelledError, GeneratorExit):
         logger.warning("Client disconnected before response was sent.")
@@ -158,30 +442,170 @@ async def chat_endpoint(request: Request):
     except Exception as e:
         logger.error("Chat endpoint error: %s", e)
         return {"error": str(e)}
+    finally:
+        INFLIGHT_REQUESTS.dec(endpoint="chat")
+        CHAT_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint="chat")
+
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(request: Request):
+    """Handle chat requests, streaming the response as NDJSON events."""
+    start = time.perf_counter()
+    form_data = await request.form()
+    message = form_data.get("prompt", "")
+    session_id = form_data.get("session_id")
+
+    if not session_id:
+        session_id = str(uuid.uuid4())
+
+    # Reject up front so overload is reported with a proper status code
+    try:
+        admission.check(session_id)
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
+
+    logger.info("Processing streaming chat request for session %s", session_id)
+    logger.info("User message: %s", Payload(message))
+
+    async def event_stream():
+        INFLIGHT_REQUESTS.inc(endpoint="chat_stream")
+        waiter = None
+        turn_task = None
+        try:
+            # Report queue position until a slot frees up; this also serializes turns per session
+            try:
+                waiter = admission.enqueue(session_id)
+                async for position, depth in admission.updates(waiter):
+                    yield json.dumps({
+                        "type": "queued",
+                        "position": position,
+                        "depth": depth,
+                        "session_id": session_id,
+                    }) + "\n"
+            except AdmissionRejected as e:
+                yield json.dumps({
+                    "type": "error",
+                    "status": e.status_code,
+                    "error": str(e),
+                    "retry_after": e.retry_after,
+                }) + "\n"
+                return
+
+            # The turn runs in its own task, which owns the admission slot from here on,
+            # so a disconnect can stop it while it still saves what it produced
+            events = asyncio.Queue()
+            turn_task = asyncio.create_task(run_chat_turn(session_id, message, "chat_stream", emit=events.put_nowait))
+            turn_task.add_done_callback(lambda _: admission.leave(waiter))
+            turn_task.add_done_callback(lambda _: events.put_nowait(None))
+            while (event := await events.get()) is not None:
+                yield json.dumps(event, default=str) + "\n"
+            response = turn_task.result()
+            yield json.dumps({
+                "type": "done",
+                "response": response,
+                "session_id": session_id,
+                "timestamp": datetime.now().isoformat(),
+            }) + "\n"
+        finally:
+            if turn_task is None:
+                if waiter is not None:
+                    admission.leave(waiter)
+            elif not turn_task.done():
+                turn_task.cancel()
+            INFLIGHT_REQUESTS.dec(endpoint="chat_stream")
+            CHAT_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint="chat_stream")
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+@app.get("/api/queue")
+async def get_queue(session_id: Optional[str] = None):
+    """Get admission queue depth and load, plus a session's queued positions."""
+    return admission.snapshot(session_id)
+
+@app.post("/api/jobs")
+async def create_job(request: Request):
+    """Submit a batch of prompts, or a prompt template with parameter sets, to run in the background."""
+    try:
+        spec = await request.json()
+    except ValueError:
+        return {"error": "Request body must be JSON"}
+    if not isinstance(spec, dict):
+        return {"error": "Request body must be a JSON object"}
+    try:
+        job = await job_runner.submit(spec)
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"job": job}
+
+@app.get("/api/jobs")
+async def list_jobs(limit: int = 50):
+    """List the most recent batch jobs with their progress."""
+    return {"jobs": await job_store.list(min(max(limit, 1), 500))}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get a batch job's status and progress."""
+    job = await job_store.get(job_id)
+    if job is None:
+        return {"error": f"Job '{job_id}' not found"}
+    return {"job": job}
+
+@app.get("/api/jobs/{job_id}/results")
+async def get_job_results(job_id: str, offset: int = 0, limit: int = 50, status: Optional[str] = None):
+    """Get a page of a batch job's items in submission order."""
+    job = await job_store.get(job_id)
+    if job is None:
+        return {"error": f"Job '{job_id}' not found"}
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), 500)
+    items = await job_store.items(job_id, offset, limit, status)
+    return {
+        "job": job,
+        "items": items,
+        "offset": offset,
+        "next_offset": offset + len(items) if len(items) == limit else None,
+    }
+
+@app.get("/api/jobs/{job_id}/stream")
+async def stream_job_results(job_id: str, after: int = 0):
+    """Stream a batch job's items as NDJSON as they finish, until the job is done."""
+    if await job_store.get(job_id) is None:
+        return {"error": f"Job '{job_id}' not found"}
+
+    async def event_stream():
+        cursor = after
+        while True:
+            # Take the event before reading so a finish in between is not missed
+            changed = job_runner.changed()
+            items = await job_store.finished_items(job_id, cursor)
+            for item in items:
+                cursor = item["seq"]
+                yield json.dumps({"type": "item", **item}) + "\n"
+            if items:
+                continue
+            job = await job_store.get(job_id)
+            if job is None or job["status"] in FINISHED_STATUSES:
+                yield json.dumps({"type": "done", "job": job}) + "\n"
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), 15)
+            except asyncio.TimeoutError:
+                pass
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a batch job's remaining items."""
+    if await job_runner.cancel(job_id):
+        return {"message": "Job cancelled"}
+    if await job_store.get(job_id) is None:
+        return {"error": f"Job '{job_id}' not found"}
+    return {"error": f"Job '{job_id}' has already finished"}
 
 @app.get("/mcp/servers")
 async def list_mcp_servers():
-    """List available MCP servers."""
-    servers = []
-    for name, client in mcp_servers.items():
-        try:
-            status = "connected"
-            tools = await client.list_tools()
-            servers.append({
-                "name": name,
-                "url": client.url,
-                "status": status,
-                "tools_count": len(tools),
-            })
-        except Exception as e:
-            logger.error("Error checking MCP server '%s': %s", name, e)
-            servers.append({
-                "name": name,
-                "url": client.url,
-                "status": "error",
-                "tools_count": 0,
-            })
-    return {"servers": servers}
+    """List available MCP servers with their last background health check."""
+    return {"servers": health_monitor.snapshot()}
 
 @app.get("/mcp/servers/{server_name}/tools")
 async def list_mcp_tools(server_name: str):
@@ -215,48 +639,81 @@ async def call_mcp_tool(server_name: str, tool_name: str, request: Request):
         )
         return {"error": str(e)}
 
+def cached_json_response(request: Request, key: str, payload: CachedPayload) -> Response:
+    """Wrap a cached payload as ``{key: payload}``, answering 304 when the client's ETag matches."""
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if payload.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=f'{{"{key}": {payload.body}}}', media_type="application/json", headers=headers
+    )
+
 @app.get("/mcp/servers/{server_name}/resources")
-async def list_mcp_resources(server_name: str):
+async def list_mcp_resources(server_name: str, request: Request):
     """List resources available from a specific MCP server."""
     if server_name not in mcp_servers:
         return {"error": f"Server '{server_name}' not found"}
 
     try:
-        resources = await mcp_servers[server_name].list_resources()
-        return {"resources": resources}
+        payload = await mcp_servers[server_name].list_resources_payload()
+        return cached_json_response(request, "resources", payload)
     except Exception as e:
         logger.error(
             "Error listing resources for server '%s': %s", server_name, e
         )
         return {"error": str(e)}
 
-@app.get("/mcp/servers/{server_name}/resources/{resource_name}")
-async def get_mcp_resource(server_name: str, resource_name: str):
+@app.get("/mcp/servers/{server_name}/resources/{resource_name:path}")
+async def get_mcp_resource(server_name: str, resource_name: str, request: Request):
     """Get a specific resource from an MCP server."""
     if server_name not in mcp_servers:
         return {"error": f"Server '{server_name}' not found"}
 
     try:
-        resource = await mcp_servers[server_name].get_resource(resource_name)
-        return {"resource": resource}
+        payload = await mcp_servers[server_name].get_resource_payload(resource_name)
+        return cached_json_response(request, "resource", payload)
     except Exception as e:
         logger.error(
             "Error getting resource '%s' from server '%s': %s", resource_name, server_name, e
         )
         return {"error": str(e)}
 
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Get tool result cache counters."""
+    return {"tool_results": tool_result_cache.stats()}
+
+@app.delete("/api/cache")
+async def clear_cache():
+    """Drop all cached tool results, in memory and on disk."""
+    await tool_result_cache.clear()
+    return {"message": "Cache cleared"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose application metrics in the Prometheus text format."""
+    ACTIVE_SESSIONS.set(await session_store.count())
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/sessions/{session_id}")
 async def get_session(session_id: str):
     """Get chat session history."""
-    if session_id not in chat_sessions:
+    session = await session_store.get(session_id)
+    if session is None:
         return {"error": "Session not found"}
-    return {"session": chat_sessions[session_id]}
+    return {"session": session}
+
+@app.get("/sessions/{session_id}/traces")
+async def get_session_traces(session_id: str):
+    """Get the execution timelines of a session's recent turns."""
+    return {"session_id": session_id, "traces": tracer.traces_for(session_id)}
 
 @app.delete("/sessions/{session_id}")
 async def delete_session(session_id: str):
     """Delete a chat session."""
-    if session_id in chat_sessions:
-        del chat_sessions[session_id]
+    llm_client.pool.forget(session_id)
+    if await session_store.delete(session_id):
         return {"message": "Session deleted"}
     return {"error": "Session not found"}
 
@@ -266,7 +723,8 @@ async def get_config():
     return {
         "ollama": {
             "url": config.get("ollama", {}).get("url", "http://localhost:11434"),
-            "model": config.get("ollama", {}).get("model", "llama3.2")
+            "model": config.get("ollama", {}).get("model", "llama3.2"),
+            "backends": llm_client.pool.snapshot(),
         },
         "mcp_servers": [
             {
@@ -278,6 +736,19 @@ async def get_config():
         ]
     }
 
+@app.get("/api/ollama/backends")
+async def list_ollama_backends():
+    """List Ollama backends with their load and health."""
+    return {"backends": llm_client.pool.snapshot()}
+
+@app.get("/api/tool-results/{ref}")
+async def get_tool_result(ref: str):
+    """Get the full text of a tool result that was compacted for the model."""
+    text = llm_client.tool_results.store.get(ref)
+    if text is None:
+        return {"error": f"Tool result '{ref}' not found"}
+    return PlainTextResponse(text)
+
 @app.get("/api/mcp/tools")
 async def get_all_mcp_tools():
     """Get all tools from all MCP servers."""
@@ -291,6 +762,21 @@ async def get_all_mcp_tools():
             all_tools[server_name] = []
     return {"tools": all_tools}
 
+@app.post("/api/mcp/tools/refresh")
+async def refresh_mcp_tools(server: Optional[str] = None):
+    """Drop the cached tool catalog (for one server or all) and fetch it again."""
+    if server is not None and server not in mcp_servers:
+        return {"error": f"Server '{server}' not found"}
+    llm_client.tool_catalog.invalidate(server)
+    tools, _ = await llm_client.list_tools(mcp_servers)
+    return {"message": "Tool catalog refreshed", "tools_count": len(tools)}
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, timeout_keep_alive=120) 
\ No newline at end of file
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        timeout_keep_alive=120,
+        workers=config.get("workers", 1),
+    ) 
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+Admission control module for CPT Inspector.
+
+Bounds how many chat turns run at once, queues the rest fairly across
+sessions, and rejects work with a retry hint once the queue is full.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+from src.metrics import ADMISSION_ACTIVE, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED, ADMISSION_WAIT_SECONDS
+
+logger = logging.getLogger("cpt-inspector.admission")
+
+
+class AdmissionRejected(Exception):
+    """Raised when a turn cannot be queued or waited too long for a slot."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        """Initialize with the HTTP status and ``Retry-After`` seconds to report."""
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class Waiter:
+    """One chat turn waiting for, or holding, a slot."""
+
+    def __init__(self, session_id: str):
+        """Create a waiter for a session's turn."""
+        self.session_id = session_id
+        self.granted: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self.changed = asyncio.Event()
+        self.enqueued_at = time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self.done = False
+
+
+class AdmissionController:
+    """Global concurrency limit with a bounded queue, fair across sessions.
+
+    At most ``max_concurrent`` turns run at once and each session runs one
+    turn at a time, so a session's turns never interleave within this
+    process; the SQLite session store's lease extends that across workers.
+    Queued sessions are served round-robin, so one busy session cannot
+    starve the others.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_queue: int = 64,
+        max_queue_per_session: int = 4,
+        queue_timeout: float = 120.0,
+    ):
+        """Initialize the controller; ``queue_timeout`` bounds the wait for a slot in seconds."""
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self.max_queue_per_session = max_queue_per_session
+        self.queue_timeout = queue_timeout
+        # Session -> its waiting turns, in round-robin order
+        self._queues: "OrderedDict[str, Deque[Waiter]]" = OrderedDict()
+        self._active_sessions: Set[str] = set()
+        self._active = 0
+        self._depth = 0
+        # Smoothed seconds a turn holds its slot, for Retry-After estimates
+        self._turn_seconds = 5.0
+        ADMISSION_QUEUE_DEPTH.set_function(lambda: self._depth)
+        ADMISSION_ACTIVE.set_function(lambda: self._active)
+
+    def retry_after(self) -> int:
+        """Estimate seconds until a newly queued turn would be admitted."""
+        rounds = (self._depth + 1) / self.max_concurrent
+        return max(1, math.ceil(rounds * self._turn_seconds))
+
+    def _can_admit(self, session_id: str) -> bool:
+        return (
+            self._active < self.max_concurrent
+            and session_id not in self._active_sessions
+            and session_id not in self._queues
+        )
+
+    def check(self, session_id: str) -> None:
+        """Raise AdmissionRejected if a turn for this session could not be queued right now.
+
+        The status is 503 when the queue is full, or 429 when the session
+        already has ``max_queue_per_session`` turns waiting.
+        """
+        if self._can_admit(session_id):
+            return
+        if self._depth >= self.max_queue:
+            ADMISSION_REJECTED.inc(reason="queue_full")
+            raise AdmissionRejected("Server is busy, the chat queue is full", 503, self.retry_after())
+        if len(self._queues.get(session_id, ())) >= self.max_queue_per_session:
+            ADMISSION_REJECTED.inc(reason="session_limit")
+            raise AdmissionRejected("Too many queued requests for this session", 429, self.retry_after())
+
+    def enqueue(self, session_id: str) -> Waiter:
+        """Queue a turn, admitting it immediately if a slot is free.
+
+        Raises AdmissionRejected as described in ``check``.
+        """
+        self.check(session_id)
+        waiter = Waiter(session_id)
+        if self._can_admit(session_id):
+            self._admit(waiter)
+            return waiter
+        self._queues.setdefault(session_id, deque()).append(waiter)
+        self._depth += 1
+        self._dispatch()
+        return waiter
+
+    async def updates(self, waiter: Waiter) -> AsyncIterator[Tuple[int, int]]:
+        """Yield ``(position, depth)`` while the turn waits, returning once it is admitted.
+
+        Raises AdmissionRejected with 503 after ``queue_timeout`` seconds.
+        """
+        deadline = waiter.enqueued_at + self.queue_timeout
+        while not waiter.granted.done():
+            yield self.position(waiter), self._depth
+            waiter.changed.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.leave(waiter)
+                ADMISSION_REJECTED.inc(reason="timeout")
+                raise AdmissionRejected("Timed out waiting for a free slot", 503, self.retry_after())
+            try:
+                await asyncio.wait_for(waiter.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def wait(self, waiter: Waiter) -> None:
+        """Wait until the turn is admitted."""
+        async for _ in self.updates(waiter):
+            pass
+
+    def leave(self, waiter: Waiter) -> None:
+        """Release a turn's slot, or drop it from the queue if it was never admitted."""
+        if waiter.done:
+            return
+        waiter.done = True
+        if waiter.granted.done():
+            self._active -= 1
+            self._active_sessions.discard(waiter.session_id)
+            held = time.monotonic() - (waiter.admitted_at or waiter.enqueued_at)
+            self._turn_seconds = 0.8 * self._turn_seconds + 0.2 * held
+        else:
+            queue = self._queues.get(waiter.session_id)
+            if queue and waiter in queue:
+                queue.remove(waiter)
+                self._depth -= 1
+                if not queue:
+                    del self._queues[waiter.session_id]
+            waiter.granted.cancel()
+        self._dispatch()
+
+    def _admit(self, waiter: Waiter) -> None:
+        waiter.admitted_at = time.monotonic()
+        waiter.granted.set_result(None)
+        waiter.changed.set()
+        self._active += 1
+        self._active_sessions.add(waiter.session_id)
+        ADMISSION_WAIT_SECONDS.observe(waiter.admitted_at - waiter.enqueued_at)
+
+    def _dispatch(self) -> None:
+        """Admit queued turns round-robin while slots are free, then wake the rest."""
+        while self._active < self.max_concurrent:
+            session_id = next((sid for sid in self._queues if sid not in self._active_sessions), None)
+            if session_id is None:
+                break
+            queue = self._queues[session_id]
+            waiter = queue.popleft()
+            self._depth -= 1
+            if queue:
+                self._queues.move_to_end(session_id)
+            else:
+                del self._queues[session_id]
+            self._admit(waiter)
+        for queue in self._queues.values():
+            for waiter in queue:
+                waiter.changed.set()
+
+    def _order(self) -> List[Waiter]:
+        """Return queued turns in the order they are expected to be admitted."""
+        order: List[Waiter] = []
+        queues = list(self._queues.values())
+        for depth in range(max((len(queue) for queue in queues), default=0)):
+            order.extend(queue[depth] for queue in queues if len(queue) > depth)
+        return order
+
+    def position(self, waiter: Waiter) -> int:
+        """Return a queued turn's 1-based position, or 0 once it is admitted."""
+        if waiter.granted.done():
+            return 0
+        try:
+            return self._order().index(waiter) + 1
+        except ValueError:
+            return 0
+
+    def snapshot(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Return queue depth and load, plus one session's queued positions if given."""
+        data: Dict[str, Any] = {
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "depth": self._depth,
+            "max_queue": self.max_queue,
+            "retry_after": self.retry_after(),
+        }
+        if session_id is not None:
+            order = self._order()
+            data["session"] = {
+                "active": session_id in self._active_sessions,
+                "positions": [i + 1 for i, waiter in enumerate(order) if waiter.session_id == session_id],
+            }
+        return data
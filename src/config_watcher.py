@@ -0,0 +1,85 @@
+"""
+Config watcher module for CPT Inspector.
+
+Polls the configuration file in the background and hands each valid new
+version to a callback, so settings can be applied without a restart.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("cpt-inspector.config")
+
+ConfigCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class ConfigWatcher:
+    """Background task that reloads a JSON config file when it changes.
+
+    Changes are detected by modification time and size every ``interval``
+    seconds. A file that fails to parse is logged and skipped; the callback
+    only ever sees complete, valid configurations.
+    """
+
+    def __init__(self, path: str, on_change: ConfigCallback, interval: float = 5.0):
+        """Initialize the watcher; ``on_change`` is awaited with each new config."""
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._stamp = self._read_stamp()
+        self._task: Optional[asyncio.Task] = None
+
+    def _read_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> Dict[str, Any]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    async def check(self) -> bool:
+        """Reload the file if it changed since the last check; return True if it was applied."""
+        stamp = self._read_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            new_config = await asyncio.get_running_loop().run_in_executor(None, self._load)
+        except (OSError, ValueError) as e:
+            logger.error("Ignoring invalid config file %s: %s", self.path, e)
+            return False
+        logger.info("Config file %s changed, applying", self.path)
+        await self.on_change(new_config)
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error("Applying config change failed: %s", e)
+
+    def start(self) -> None:
+        """Start polling the config file."""
+        if self.interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Watching %s for changes (interval %ss)", self.path, self.interval)
+
+    async def stop(self) -> None:
+        """Stop polling the config file."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,95 @@
+"""
+Context window module for CPT Inspector.
+
+Keeps the message history sent to the LLM within a token budget.
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger("cpt-inspector.context")
+
+# Rough per-message overhead for role markers and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class ContextWindow:
+    """Trims chat history to a token budget before it is sent to the model.
+
+    System messages and the current turn (from the last user message on)
+    are always kept. Older tool outputs are replaced by a short placeholder
+    first, then whole older turns are dropped, oldest first.
+    """
+
+    def __init__(self, max_tokens: int = 8192, chars_per_token: float = 4.0):
+        """Initialize the window with a token budget (0 disables trimming)."""
+        self.max_tokens = max_tokens
+        self.chars_per_token = chars_per_token
+
+    def estimate_tokens(self, message: Dict[str, Any]) -> int:
+        """Estimate the token count of a message from its length."""
+        chars = len(str(message.get("content") or ""))
+        if message.get("tool_calls"):
+            chars += len(json.dumps(message["tool_calls"], default=str))
+        return int(chars / self.chars_per_token) + MESSAGE_OVERHEAD_TOKENS
+
+    def fit(self, messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """Return a copy of the messages that fits the budget, plus trimming stats."""
+        tokens = [self.estimate_tokens(message) for message in messages]
+        original_tokens = sum(tokens)
+        stats = {
+            "original_tokens": original_tokens,
+            "tokens": original_tokens,
+            "trimmed_tool_outputs": 0,
+            "dropped_messages": 0,
+        }
+        if not self.max_tokens or original_tokens <= self.max_tokens:
+            return messages, stats
+
+        current_turn = max(
+            (i for i, message in enumerate(messages) if message.get("role") == "user"), default=0
+        )
+        fitted = list(messages)
+        total = original_tokens
+
+        # Older tool outputs go first, oldest first
+        for i in range(current_turn):
+            if total <= self.max_tokens:
+                break
+            if fitted[i].get("role") != "tool":
+                continue
+            placeholder = {
+                **fitted[i],
+                "content": f"[tool output omitted from context: ~{tokens[i]} tokens]",
+            }
+            placeholder_tokens = self.estimate_tokens(placeholder)
+            if placeholder_tokens >= tokens[i]:
+                continue
+            total -= tokens[i] - placeholder_tokens
+            tokens[i] = placeholder_tokens
+            fitted[i] = placeholder
+            stats["trimmed_tool_outputs"] += 1
+
+        # Then whole turns, so no tool result is left without its call
+        turn_starts = sorted({0, current_turn} | {
+            i for i, message in enumerate(fitted[:current_turn]) if message.get("role") == "user"
+        })
+        dropped = set()
+        for start, end in zip(turn_starts, turn_starts[1:]):
+            if total <= self.max_tokens:
+                break
+            for i in range(start, end):
+                if fitted[i].get("role") != "system":
+                    dropped.add(i)
+                    total -= tokens[i]
+        if dropped:
+            fitted = [message for i, message in enumerate(fitted) if i not in dropped]
+
+        stats["tokens"] = total
+        stats["dropped_messages"] = len(dropped)
+        logger.info(
+            "Context trimmed from ~%d to ~%d tokens (%d tool outputs trimmed, %d messages dropped)",
+            original_tokens, total, stats["trimmed_tool_outputs"], stats["dropped_messages"],
+        )
+        return fitted, stats
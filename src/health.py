@@ -0,0 +1,114 @@
+"""
+Health monitor module for CPT Inspector.
+
+Periodically probes MCP servers in the background so status requests and
+the chat path never have to wait on a server themselves.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("cpt-inspector.health")
+
+
+class HealthMonitor:
+    """Background task that probes every MCP server concurrently."""
+
+    def __init__(self, mcp_servers: Dict[str, Any], interval: float = 30.0, timeout: float = 5.0):
+        """Initialize the monitor for a mapping of server names to MCP clients."""
+        self.mcp_servers = mcp_servers
+        self.interval = interval
+        self.timeout = timeout
+        self.status: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def probe(self, name: str, client: Any) -> Dict[str, Any]:
+        """Probe one server with a ping and record the outcome.
+
+        Tools are only counted when a server first connects or recovers; later
+        probes keep the previous count.
+        """
+        start = time.perf_counter()
+        result: Dict[str, Any] = {"name": name, "url": client.url}
+        previous = self.status.get(name) or {}
+        try:
+            await asyncio.wait_for(client.ping(), self.timeout)
+            result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            tools_count = previous.get("tools_count") if previous.get("status") == "connected" else None
+            if tools_count is None:
+                tools = await asyncio.wait_for(client.list_tools(), self.timeout)
+                tools_count = len(tools.tools) if hasattr(tools, "tools") else 0
+            result.update({"status": "connected", "tools_count": tools_count, "last_error": None})
+        except asyncio.TimeoutError:
+            result.update({"status": "error", "tools_count": 0, "last_error": f"timed out after {self.timeout}s"})
+        except Exception as e:
+            result.update({"status": "error", "tools_count": 0, "last_error": str(e)})
+        result.setdefault("latency_ms", round((time.perf_counter() - start) * 1000, 1))
+        result["checked_at"] = datetime.now().isoformat()
+        if result["status"] != "connected":
+            logger.warning("MCP server '%s' unhealthy: %s", name, result["last_error"])
+        self.status[name] = result
+        return result
+
+    async def probe_all(self) -> None:
+        """Probe all servers concurrently."""
+        servers = dict(self.mcp_servers)
+        await asyncio.gather(*(self.probe(name, client) for name, client in servers.items()))
+        for name in list(self.status):
+            if name not in servers:
+                del self.status[name]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error("Health check round failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the background probe loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("MCP health monitor started (interval %ss)", self.interval)
+
+    async def stop(self) -> None:
+        """Stop the background probe loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def forget(self, name: str) -> None:
+        """Drop the recorded status of a server that was removed."""
+        self.status.pop(name, None)
+
+    def is_healthy(self, name: str) -> bool:
+        """Return False only for servers whose last probe failed."""
+        status = self.status.get(name)
+        return status is None or status["status"] == "connected"
+
+    def healthy_servers(self) -> Dict[str, Any]:
+        """Return the MCP clients that are not known to be unhealthy."""
+        return {name: client for name, client in self.mcp_servers.items() if self.is_healthy(name)}
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return the latest status of every server, in configuration order."""
+        return [
+            self.status.get(name, {
+                "name": name,
+                "url": client.url,
+                "status": "unknown",
+                "tools_count": 0,
+                "latency_ms": None,
+                "last_error": None,
+                "checked_at": None,
+            })
+            for name, client in self.mcp_servers.items()
+        ]
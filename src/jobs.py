@@ -0,0 +1,470 @@
+"""
+Batch job module for CPT Inspector.
+
+Runs batches of prompts through a bounded pool of workers and persists every
+job and the outcome of each of its items in SQLite, so progress can be
+followed while a job runs and survives a restart.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.metrics import JOB_ITEMS, JOB_QUEUE_DEPTH
+
+logger = logging.getLogger("cpt-inspector.jobs")
+
+# Job statuses after which nothing more will happen
+FINISHED_STATUSES = ("completed", "cancelled")
+
+RunItem = Callable[[str, int, str], Awaitable[str]]
+
+
+def expand_prompts(spec: Dict[str, Any]) -> Tuple[List[str], List[Optional[Dict[str, Any]]]]:
+    """Return the prompts a job request asks for and the parameter set each was rendered from.
+
+    A request carries either ``prompts``, a list of strings, or a
+    ``template`` with ``{name}`` placeholders and a list of ``parameters``
+    objects to fill it with. Raises ValueError for anything else.
+    """
+    prompts = spec.get("prompts")
+    template = spec.get("template")
+    if (prompts is None) == (template is None):
+        raise ValueError("Provide either 'prompts' or 'template' with 'parameters'")
+    if prompts is not None:
+        if not isinstance(prompts, list) or not all(isinstance(prompt, str) and prompt.strip() for prompt in prompts):
+            raise ValueError("'prompts' must be a list of non-empty strings")
+        return prompts, [None] * len(prompts)
+    parameters = spec.get("parameters")
+    if not isinstance(template, str) or not template.strip():
+        raise ValueError("'template' must be a non-empty string")
+    if not isinstance(parameters, list) or not all(isinstance(values, dict) for values in parameters):
+        raise ValueError("'parameters' must be a list of objects")
+    rendered = []
+    for i, values in enumerate(parameters):
+        try:
+            rendered.append(template.format_map(values))
+        except KeyError as e:
+            raise ValueError(f"Parameter set {i} is missing {e}")
+        except (IndexError, ValueError) as e:
+            raise ValueError(f"Parameter set {i} does not fit the template: {e}")
+    return rendered, parameters
+
+
+class JobStore:
+    """SQLite store of batch jobs and their items.
+
+    Items record the order they finished in (``seq``) so completed results
+    can be streamed and resumed from a cursor. A running item is leased to
+    the store that claimed it, identified by ``owner``, and the lease lapses
+    unless renewed within ``lease`` seconds, so several processes can share
+    one database and only items of a process that died are run again.
+    Blocking SQLite calls run in a worker thread to keep the event loop free.
+    """
+
+    def __init__(self, path: str = "data/jobs.db", ttl: float = 604800, lease: float = 60):
+        """Open (and create if needed) the database; finished jobs are deleted after ``ttl`` seconds."""
+        self.path = path
+        self.ttl = ttl
+        self.lease = lease
+        self.owner = uuid.uuid4().hex
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                name TEXT,
+                status TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS job_items (
+                job_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                prompt TEXT NOT NULL,
+                parameters TEXT,
+                status TEXT NOT NULL,
+                response TEXT,
+                error TEXT,
+                seq INTEGER,
+                started_at REAL,
+                finished_at REAL,
+                owner TEXT,
+                heartbeat_at REAL,
+                PRIMARY KEY (job_id, idx)
+            );
+            CREATE INDEX IF NOT EXISTS job_items_seq ON job_items (job_id, seq);
+            CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at);
+        """)
+        # Databases created before items were leased lack the lease columns
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(job_items)")}
+        for column, kind in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE job_items ADD COLUMN {column} {kind}")
+        self._conn.commit()
+        logger.info("Job store opened at %s", self.path)
+
+    def _expire(self) -> None:
+        if not self.ttl:
+            return
+        cutoff = time.time() - self.ttl
+        self._conn.execute(
+            "DELETE FROM job_items WHERE job_id IN (SELECT job_id FROM jobs WHERE finished_at < ?)", (cutoff,)
+        )
+        self._conn.execute("DELETE FROM jobs WHERE finished_at < ?", (cutoff,))
+
+    def _job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        counts = dict(self._conn.execute(
+            "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)
+        ).fetchall())
+        job["progress"] = {status: counts.get(status, 0) for status in ("pending", "running", "succeeded", "failed", "cancelled")}
+        return job
+
+    @staticmethod
+    def _item(row: sqlite3.Row) -> Dict[str, Any]:
+        item = dict(row)
+        item["index"] = item.pop("idx")
+        item.pop("owner", None)
+        item.pop("heartbeat_at", None)
+        item["parameters"] = json.loads(item["parameters"]) if item["parameters"] else None
+        return item
+
+    def _create(self, job_id: str, name: Optional[str], prompts: List[str], parameters: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        with self._lock, self._conn:
+            self._expire()
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, name, status, total, created_at) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, name, len(prompts), time.time()),
+            )
+            self._conn.executemany(
+                "INSERT INTO job_items (job_id, idx, prompt, parameters, status) VALUES (?, ?, ?, ?, 'pending')",
+                [
+                    (job_id, i, prompt, json.dumps(values, default=str) if values is not None else None)
+                    for i, (prompt, values) in enumerate(zip(prompts, parameters))
+                ],
+            )
+            return self._job(job_id)
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._job(job_id)
+
+    def _list(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+            return [self._job(job_id) for (job_id,) in rows]
+
+    def _claim(self, job_id: str, index: int) -> bool:
+        with self._lock, self._conn:
+            now = time.time()
+            cursor = self._conn.execute(
+                "UPDATE job_items SET status = 'running', started_at = ?, owner = ?, heartbeat_at = ? "
+                "WHERE job_id = ? AND idx = ? AND status = 'pending'",
+                (now, self.owner, now, job_id, index),
+            )
+            if cursor.rowcount == 0:
+                return False
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = COALESCE(started_at, ?) "
+                "WHERE job_id = ? AND status = 'queued'",
+                (now, job_id),
+            )
+            return True
+
+    def _finish(self, job_id: str, index: int, status: str, response: Optional[str], error: Optional[str]) -> bool:
+        with self._lock, self._conn:
+            now = time.time()
+            cursor = self._conn.execute(
+                "UPDATE job_items SET status = ?, response = ?, error = ?, finished_at = ?, owner = NULL, "
+                "seq = (SELECT COALESCE(MAX(seq), 0) + 1 FROM job_items WHERE job_id = ?) "
+                "WHERE job_id = ? AND idx = ? AND status = 'running' AND owner = ?",
+                (status, response, error, now, job_id, job_id, index, self.owner),
+            )
+            if cursor.rowcount == 0:
+                logger.warning("Job %s item %d finished after its lease was taken over; discarding the result", job_id, index)
+                return False
+            remaining = self._conn.execute(
+                "SELECT COUNT(*) FROM job_items WHERE job_id = ? AND status IN ('pending', 'running')", (job_id,)
+            ).fetchone()[0]
+            if remaining:
+                return False
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'completed', finished_at = ? WHERE job_id = ? AND status = 'running'",
+                (now, job_id),
+            )
+            return cursor.rowcount > 0
+
+    def _cancel(self, job_id: str) -> bool:
+        with self._lock, self._conn:
+            now = time.time()
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? "
+                "WHERE job_id = ? AND status IN ('queued', 'running')",
+                (now, job_id),
+            )
+            if cursor.rowcount == 0:
+                return False
+            self._conn.execute(
+                "UPDATE job_items SET status = 'cancelled', finished_at = ?, "
+                "seq = (SELECT COALESCE(MAX(seq), 0) FROM job_items WHERE job_id = ?) + idx + 1 "
+                "WHERE job_id = ? AND status = 'pending'",
+                (now, job_id, job_id),
+            )
+            return True
+
+    def _items(self, job_id: str, offset: int, limit: int, status: Optional[str]) -> List[Dict[str, Any]]:
+        query = "SELECT * FROM job_items WHERE job_id = ?"
+        args: List[Any] = [job_id]
+        if status:
+            query += " AND status = ?"
+            args.append(status)
+        query += " ORDER BY idx LIMIT ? OFFSET ?"
+        args.extend([limit, offset])
+        with self._lock:
+            return [self._item(row) for row in self._conn.execute(query, args).fetchall()]
+
+    def _finished_items(self, job_id: str, after: int, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM job_items WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?", (job_id, after, limit)
+            ).fetchall()
+            return [self._item(row) for row in rows]
+
+    def _renew(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_items SET heartbeat_at = ? WHERE owner = ? AND status = 'running'",
+                (time.time(), self.owner),
+            )
+
+    def _release(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_items SET status = 'pending', started_at = NULL, owner = NULL, heartbeat_at = NULL "
+                "WHERE owner = ? AND status = 'running'",
+                (self.owner,),
+            )
+
+    def _reclaim(self) -> List[Tuple[str, int, str]]:
+        with self._lock, self._conn:
+            return [tuple(row) for row in self._conn.execute(
+                "UPDATE job_items SET status = 'pending', started_at = NULL, owner = NULL, heartbeat_at = NULL "
+                "WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?) "
+                "RETURNING job_id, idx, prompt",
+                (time.time() - self.lease,),
+            ).fetchall()]
+
+    def _recover(self) -> List[Tuple[str, int, str]]:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_items SET status = 'pending', started_at = NULL, owner = NULL, heartbeat_at = NULL "
+                "WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (time.time() - self.lease,),
+            )
+            return [tuple(row) for row in self._conn.execute(
+                "SELECT i.job_id, i.idx, i.prompt FROM job_items i JOIN jobs j ON j.job_id = i.job_id "
+                "WHERE j.status IN ('queued', 'running') AND i.status = 'pending' "
+                "ORDER BY j.created_at, i.idx"
+            ).fetchall()]
+
+    async def create(self, job_id: str, name: Optional[str], prompts: List[str], parameters: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Store a new job with one pending item per prompt."""
+        return await asyncio.to_thread(self._create, job_id, name, prompts, parameters)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job with per-status item counts, or None if it does not exist."""
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return the most recently created jobs."""
+        return await asyncio.to_thread(self._list, limit)
+
+    async def claim(self, job_id: str, index: int) -> bool:
+        """Mark a pending item as running; return False if it was cancelled or already taken."""
+        return await asyncio.to_thread(self._claim, job_id, index)
+
+    async def finish(self, job_id: str, index: int, status: str, response: Optional[str] = None, error: Optional[str] = None) -> bool:
+        """Record a running item's outcome; return True if that completed the job."""
+        return await asyncio.to_thread(self._finish, job_id, index, status, response, error)
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancel a job's pending items; return False if the job was not queued or running."""
+        return await asyncio.to_thread(self._cancel, job_id)
+
+    async def items(self, job_id: str, offset: int = 0, limit: int = 50, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return a page of a job's items in submission order."""
+        return await asyncio.to_thread(self._items, job_id, offset, limit, status)
+
+    async def finished_items(self, job_id: str, after: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """Return items that finished after the ``after`` cursor, in the order they finished."""
+        return await asyncio.to_thread(self._finished_items, job_id, after, limit)
+
+    async def renew(self) -> None:
+        """Extend the leases of the items this store is running."""
+        await asyncio.to_thread(self._renew)
+
+    async def release(self) -> None:
+        """Return the items this store is running to pending so they can be resumed."""
+        await asyncio.to_thread(self._release)
+
+    async def reclaim(self) -> List[Tuple[str, int, str]]:
+        """Return running items whose lease lapsed to pending and return ``(job_id, index, prompt)`` for each."""
+        return await asyncio.to_thread(self._reclaim)
+
+    async def recover(self) -> List[Tuple[str, int, str]]:
+        """Return ``(job_id, index, prompt)`` for every pending item, requeuing running ones whose lease lapsed."""
+        return await asyncio.to_thread(self._recover)
+
+
+class JobRunner:
+    """Bounded pool of workers draining batch job items in submission order.
+
+    At most ``workers`` items run at once across all jobs. Each item is
+    handed to ``run_item(job_id, index, prompt)``, which returns the
+    response; exceptions mark the item failed without stopping the job.
+    While running, the leases of its items are renewed and items whose
+    lease lapsed elsewhere are taken over.
+    """
+
+    def __init__(self, store: JobStore, run_item: RunItem, workers: int = 2, max_items: int = 1000):
+        """Initialize the runner; ``max_items`` bounds the size of one job."""
+        self.store = store
+        self.run_item = run_item
+        self.workers = max(1, workers)
+        self.max_items = max_items
+        self._queue: "asyncio.Queue[Tuple[str, int, str]]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[str, Dict[int, asyncio.Task]] = {}
+        self._stopping = False
+        self._changed = asyncio.Event()
+        JOB_QUEUE_DEPTH.set_function(lambda: self._queue.qsize())
+
+    def changed(self) -> asyncio.Event:
+        """Return an event that is set the next time any item or job finishes."""
+        return self._changed
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def submit(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a job from a request body and queue its items.
+
+        Raises ValueError if the request is invalid or too large.
+        """
+        prompts, parameters = expand_prompts(spec)
+        if not prompts:
+            raise ValueError("A job needs at least one prompt")
+        if self.max_items and len(prompts) > self.max_items:
+            raise ValueError(f"A job may have at most {self.max_items} prompts, got {len(prompts)}")
+        job_id = uuid.uuid4().hex
+        job = await self.store.create(job_id, spec.get("name"), prompts, parameters)
+        for index, prompt in enumerate(prompts):
+            self._queue.put_nowait((job_id, index, prompt))
+        logger.info("Job %s queued with %d items", job_id, len(prompts))
+        return job
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancel a job's pending items and interrupt its running ones."""
+        if not await self.store.cancel(job_id):
+            return False
+        for task in list(self._running.get(job_id, {}).values()):
+            task.cancel()
+        logger.info("Job %s cancelled", job_id)
+        self._notify()
+        return True
+
+    async def _run(self, job_id: str, index: int, prompt: str) -> None:
+        if not await self.store.claim(job_id, index):
+            return
+        task = asyncio.create_task(self.run_item(job_id, index, prompt))
+        self._running.setdefault(job_id, {})[index] = task
+        status, response, error = "succeeded", None, None
+        try:
+            response = await task
+        except asyncio.CancelledError:
+            if self._stopping or not task.cancelled():
+                raise
+            status, error = "cancelled", "Job cancelled"
+        except Exception as e:
+            logger.warning("Job %s item %d failed: %s", job_id, index, e)
+            status, error = "failed", str(e) or type(e).__name__
+        finally:
+            running = self._running.get(job_id, {})
+            running.pop(index, None)
+            if not running:
+                self._running.pop(job_id, None)
+        JOB_ITEMS.inc(status=status)
+        if await self.store.finish(job_id, index, status, response, error):
+            logger.info("Job %s completed", job_id)
+        self._notify()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.store.lease / 3)
+            try:
+                await self.store.renew()
+                reclaimed = await self.store.reclaim()
+            except Exception as e:
+                logger.error("Renewing job item leases failed: %s", e)
+                continue
+            for item in reclaimed:
+                self._queue.put_nowait(item)
+            if reclaimed:
+                logger.warning("Taking over %d job items whose lease lapsed", len(reclaimed))
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, index, prompt = await self._queue.get()
+            try:
+                await self._run(job_id, index, prompt)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Job %s item %d could not be processed: %s", job_id, index, e)
+            finally:
+                self._queue.task_done()
+
+    async def start(self) -> None:
+        """Requeue unfinished items from the store and start the workers."""
+        if self._tasks:
+            return
+        self._stopping = False
+        recovered = await self.store.recover()
+        for item in recovered:
+            self._queue.put_nowait(item)
+        if recovered:
+            logger.info("Resuming %d unfinished job items", len(recovered))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.store.lease:
+            self._tasks.append(asyncio.create_task(self._heartbeat()))
+        logger.info("Job runner started with %d workers", self.workers)
+
+    async def stop(self) -> None:
+        """Stop the workers and release interrupted items for the next ``start`` or another process."""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.store.release()
@@ -4,12 +4,32 @@ LLM Client module for CPT Inspector.
 Provides client implementations for various LLM providers including Ollama.
 """
 
+import asyncio
+import hashlib
+import json
 import logging
-import pprint
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from ollama import AsyncClient
+from src.context_window import ContextWindow
+from src.logging_setup import Payload
+from src.metrics import (
+    OLLAMA_CHAT_SECONDS,
+    OLLAMA_EVAL_SECONDS,
+    OLLAMA_EVAL_TOKENS,
+    OLLAMA_PROMPT_EVAL_SECONDS,
+    OLLAMA_PROMPT_TOKENS,
+    TOOL_LOOP_ITERATIONS,
+    TOOL_SELECTION_FALLBACKS,
+    TOOL_SELECTIONS,
+)
+from src.ollama_pool import OllamaBackend, OllamaPool, is_backend_error
+from src.single_flight import SingleFlight
+from src.tool_results import READ_TOOL_RESULT, ToolResultCompactor, ToolResultStore
+from src.tool_selector import ToolSelector
+from src.tracing import tracer
 
 logger = logging.getLogger("cpt-inspector.llm")
 
@@ -18,10 +38,65 @@ class LLMClient(ABC):
     """Abstract base class for LLM clients."""
 
     @abstractmethod
-    async def chat(self, messages: List[Dict[str, str]], mcp_servers: Optional[Dict[str, Any]] = None) -> str:
+    async def chat(self, messages: List[Dict[str, str]], mcp_servers: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None) -> str:
         """Send a chat message and return the response."""
         pass
 
+    @abstractmethod
+    def chat_stream(self, messages: List[Dict[str, str]], mcp_servers: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Send a chat message and yield response events as they are produced."""
+        pass
+
+
+class ToolCatalog:
+    """Per-server cache of MCP tool schemas converted to Ollama's format.
+
+    Entries expire after ``ttl`` seconds (0 disables expiry) and are dropped
+    as soon as a server sends ``notifications/tools/list_changed``.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        """Initialize an empty catalog with the given TTL in seconds."""
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._watched: Dict[str, Any] = {}
+
+    def get(self, server_name: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached tools for a server, or None if missing or expired."""
+        entry = self._entries.get(server_name)
+        if entry is None:
+            return None
+        cached_at, tools = entry
+        if self.ttl and time.monotonic() - cached_at >= self.ttl:
+            del self._entries[server_name]
+            return None
+        return tools
+
+    def put(self, server_name: str, tools: List[Dict[str, Any]]) -> None:
+        """Store the converted tools for a server."""
+        self._entries[server_name] = (time.monotonic(), tools)
+
+    def invalidate(self, server_name: Optional[str] = None) -> None:
+        """Drop the cached tools for one server, or for all servers."""
+        if server_name is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(server_name, None)
+        logger.info("Tool catalog invalidated for %s", server_name or "all servers")
+
+    def forget(self, server_name: str) -> None:
+        """Drop everything known about a server that was removed."""
+        self._entries.pop(server_name, None)
+        self._watched.pop(server_name, None)
+
+    def watch(self, server_name: str, mcp_client: Any) -> None:
+        """Invalidate a server's entry whenever its tool list changes."""
+        if self._watched.get(server_name) is mcp_client:
+            return
+        self._watched[server_name] = mcp_client
+        if hasattr(mcp_client, "on_tools_changed"):
+            mcp_client.on_tools_changed(lambda: self.invalidate(server_name))
+
 
 class OllamaClient(LLMClient):
     """Ollama LLM client implementation."""
@@ -30,89 +105,434 @@ class OllamaClient(LLMClient):
         """Initialize Ollama client with configuration."""
         self.url = config.get("url", "http://localhost:11434")
         self.model = config.get("model", "llama3.2")
-        self.client = AsyncClient(host=self.url,timeout=500)
-        # Convert MCP servers list to dictionary for compatibility
-        mcp_servers_list = config.get("mcp_servers", [])
-        self.mcp_servers = {}
-        for server in mcp_servers_list:
-            if server.get("enabled", True):
-                self.mcp_servers[server.get("name", "unknown")] = server
-
-    async def list_tools(self) -> List[Dict[str, Any]]:
-        """List available tools from MCP servers."""
-        available_tools = []
-        for mcp_name, mcp_client in self.mcp_servers.items():
+        backends = config.get("backends") or [{"url": self.url, "model": self.model}]
+        self.pool = OllamaPool(
+            [OllamaBackend(
+                backend.get("url", self.url),
+                backend.get("model", self.model),
+                name=backend.get("name"),
+                weight=backend.get("weight", 1.0),
+            ) for backend in backends],
+            affinity_slack=config.get("affinity_slack", 2),
+            max_backoff=config.get("backend_max_backoff", 30),
+        )
+        self.keep_alive = config.get("keep_alive")
+        self.tool_catalog = ToolCatalog(ttl=config.get("tool_cache_ttl", 300))
+        self.discovery_timeout = config.get("tool_discovery_timeout", 10)
+        self.max_parallel_tools = config.get("max_parallel_tools", 4)
+        self.tool_call_timeout = config.get("tool_call_timeout", 120)
+        self.max_tool_iterations = config.get("max_tool_iterations", 10)
+        self.turn_timeout = config.get("turn_timeout", 300)
+        self.context_window = ContextWindow(max_tokens=config.get("context_max_tokens", 8192))
+        self.tool_results = ToolResultCompactor(
+            max_chars=config.get("tool_result_max_chars", 4000),
+            budgets=config.get("tool_result_budgets", {}),
+            top_rows=config.get("tool_result_top_rows", 5),
+            store=ToolResultStore(max_bytes=config.get("tool_result_store_bytes", 64 * 1024 * 1024)),
+        )
+        self.tool_selector = ToolSelector(
+            top_k=config.get("tool_top_k", 8),
+            embedding_model=config.get("tool_embedding_model"),
+            embed=self._embed,
+        )
+        self.stateless_generations = SingleFlight("llm_generation") if config.get("coalesce_stateless", False) else None
+
+    async def _discover_tools(self, mcp_name: str, mcp_client: Any) -> List[Dict[str, Any]]:
+        """Return one server's tools in Ollama format, fetching them on a catalog miss."""
+        cached = self.tool_catalog.get(mcp_name)
+        if cached is not None:
+            return cached
+        self.tool_catalog.watch(mcp_name, mcp_client)
+        try:
+            server_tools = await asyncio.wait_for(mcp_client.list_tools(), self.discovery_timeout)
+            converted = [{
+            "type": "function",
+            "function": {
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": tool.inputSchema
+            }
+            } for tool in server_tools.tools]
+            self.tool_catalog.put(mcp_name, converted)
+            logger.info("Found %d tools from server %s", len(converted), mcp_name)
+            logger.debug("Tools from server %s: %s", mcp_name, Payload(converted))
+            return converted
+        except asyncio.TimeoutError:
+            logger.error("Timed out listing tools from server %s after %ss", mcp_name, self.discovery_timeout)
+        except Exception as e:
+            logger.error("Error listing tools from server %s: %s", mcp_name, e)
+        return []
+
+    async def preload(self) -> None:
+        """Load the model on every backend so the first chat does not wait for it."""
+        async def load(backend: OllamaBackend) -> None:
+            start = time.perf_counter()
             try:
-                server_tools = await mcp_client.list_tools()
-                available_tools = [{
-                "type": "function",
-                "function": {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": tool.inputSchema
-                }
-                } for tool in server_tools.tools]
-                logger.info("Found %d tools from server %s: %s", len(available_tools), mcp_name, available_tools)
+                await backend.client.generate(model=backend.model, prompt="", keep_alive=self.keep_alive)
             except Exception as e:
-                logger.error("Error listing tools from server %s: %s", mcp_name, e)
-        return available_tools
+                if is_backend_error(e):
+                    self.pool.record_failure(backend, e)
+                logger.warning("Could not preload model %s on Ollama backend %s: %s", backend.model, backend.name, e)
+                return
+            logger.info(
+                "Loaded model %s on Ollama backend %s in %.1fs", backend.model, backend.name, time.perf_counter() - start
+            )
 
-    async def chat(self, messages: List[Dict[str, str]], mcp_servers: Optional[Dict[str, Any]] = None) -> str:
-        """Send a chat message and return the response."""
-        self.mcp_servers = mcp_servers or {}
-        tools = await self.list_tools()
-        content = ""
-        while True:
-            response = await self.client.chat(
-                model=self.model,
-                messages=messages,
-                tools=tools if tools else None,
+        await asyncio.gather(*(load(backend) for backend in self.pool.backends))
+
+    async def list_tools(self, mcp_servers: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, Tuple[str, str]]]:
+        """List available tools from the given MCP servers concurrently.
+
+        Returns the tools in Ollama format and the routing index mapping each
+        exposed name to ``(server name, tool name on that server)``. Tool
+        names offered by more than one server are exposed as
+        ``<server>__<tool>`` so every name maps to exactly one server.
+        """
+        names = list(mcp_servers)
+        with tracer.span("tool_discovery", servers=len(names)) as span:
+            results = await asyncio.gather(
+                *(self._discover_tools(name, mcp_servers[name]) for name in names)
             )
-            content = response['message']['content']
-            logger.info("OllamaClient.chat: response: %s", response)
-            tool_calls = response['message'].get('tool_calls', [])
-            if not tool_calls:
-                logger.info("No tool calls found in response")
-                break
-            for tool_call in tool_calls:
-                logger.info("OllamaClient detected tool call: %s", tool_call)
-                # Extract the Function object from the ToolCall
-                if hasattr(tool_call, 'function'):
-                    function_obj = tool_call.function
-                    logger.info("Extracted function: %s", function_obj)
-                    tool_result = await self._call_mcp_tool(function_obj, mcp_servers)
-                    logger.info("MCP tool result: %s", tool_result)
-                    messages.append({"role": "tool", "content": str(tool_result)})
+            span.set(tools=sum(len(server_tools) for server_tools in results))
+        owners: Dict[str, int] = {}
+        for server_tools in results:
+            for tool in server_tools:
+                owners[tool["function"]["name"]] = owners.get(tool["function"]["name"], 0) + 1
+
+        available_tools = []
+        tool_index: Dict[str, Tuple[str, str]] = {}
+        for mcp_name, server_tools in zip(names, results):
+            for tool in server_tools:
+                tool_name = tool["function"]["name"]
+                if owners[tool_name] > 1:
+                    exposed_name = f"{mcp_name}__{tool_name}"
+                    tool = {**tool, "function": {**tool["function"], "name": exposed_name}}
                 else:
-                    logger.warning("ToolCall does not have function attribute: %s", tool_call)
-            continue
+                    exposed_name = tool_name
+                tool_index[exposed_name] = (mcp_name, tool_name)
+                available_tools.append(tool)
+        return available_tools, tool_index
+
+    async def chat(self, messages: List[Dict[str, str]], mcp_servers: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None) -> str:
+        """Send a chat message and return the response.
+
+        With ``coalesce_stateless`` enabled, concurrent identical prompts that
+        have no prior conversation share one generation, and its tool
+        exchanges are appended to every caller's ``messages``.
+        """
+        key = self._stateless_key(messages, mcp_servers) if self.stateless_generations is not None else None
+        if key is None:
+            return await self._chat(messages, mcp_servers, session_id)
+        content, added = await self.stateless_generations.do(key, lambda: self._shared_turn(messages, mcp_servers, session_id))
+        messages.extend(added)
+        return content
+
+    async def _chat(self, messages: List[Dict[str, str]], mcp_servers: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None) -> str:
+        """Drain the event stream and return the final response."""
+        content = ""
+        async for event in self.chat_stream(messages, mcp_servers, session_id):
+            if event["type"] == "done":
+                content = event["content"]
         return content
 
-    async def _call_mcp_tool(self, tool_call: dict, mcp_servers: Dict[str, Any]) -> Any:
-        """Call MCP tool based on parsed tool call."""
-        logger.info("OllamaClient._call_mcp_tool: tool_call: %s", tool_call)
-        pprint.pprint(tool_call)
+    async def _shared_turn(self, messages: List[Dict[str, str]], mcp_servers: Optional[Dict[str, Any]], session_id: Optional[str]) -> Tuple[str, List[Dict[str, Any]]]:
+        """Run one turn on a copy of ``messages``, returning the response and the messages it added."""
+        turn = list(messages)
+        content = await self._chat(turn, mcp_servers, session_id)
+        return content, turn[len(messages):]
+
+    def _stateless_key(self, messages: List[Dict[str, str]], mcp_servers: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Return a coalescing key for a prompt with no prior conversation, or None."""
+        conversation = [message for message in messages if message.get("role") != "system"]
+        if len(conversation) != 1 or conversation[0].get("role") != "user":
+            return None
+        canonical = json.dumps(
+            [self.model, sorted(mcp_servers or {}), [(message.get("role"), message.get("content")) for message in messages]],
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def chat_stream(self, messages: List[Dict[str, str]], mcp_servers: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Run the tool loop with streaming enabled and yield events as they arrive.
+
+        Events are dictionaries with a ``type`` key: ``token`` for content
+        deltas, ``tool_call_start``/``tool_call_end`` around each MCP tool
+        call, ``context`` when older history had to be trimmed to fit the
+        token budget, ``tool_limit`` when ``max_tool_iterations`` rounds have
+        called tools and the model must answer without them, and a final
+        ``done`` carrying the complete last response. ``session_id`` keeps a
+        session's rounds on the same Ollama backend.
+
+        If the stream is cancelled or closed early, ``messages`` is left well
+        formed: unfinished tool calls get error results, and a partially
+        generated response is appended with ``interrupted`` set.
+        """
+        mcp_servers = mcp_servers or {}
+        all_tools, tool_index = await self.list_tools(mcp_servers)
+        tools = all_tools
+        if self.tool_selector.enabled_for(all_tools):
+            with tracer.span("tool_selection", available=len(all_tools)) as span:
+                tools, method = await self.tool_selector.select(self._selection_query(messages), all_tools)
+                span.set(method=method, selected=len(tools))
+            TOOL_SELECTIONS.inc(method=method)
+        tools = list(tools)
+        if self._has_stored_results(messages):
+            tools.append(self.tool_results.tool_spec())
+        content = ""
+        calls: List[Any] = []
+        results: Optional[List[Optional[str]]] = None
+        iterations = 0
+        try:
+            while True:
+                iterations += 1
+                content = ""
+                tool_calls = []
+                # Past the cap the model gets no tools and has to answer with what it has
+                final_round = bool(self.max_tool_iterations) and iterations > self.max_tool_iterations
+                if final_round:
+                    logger.warning("Turn reached %d tool rounds; asking the model to answer without tools", self.max_tool_iterations)
+                    tracer.annotate(tool_limit=self.max_tool_iterations)
+                    yield {"type": "tool_limit", "max_tool_iterations": self.max_tool_iterations}
+                window, context_stats = self.context_window.fit(messages)
+                if window is not messages:
+                    yield {"type": "context", **context_stats}
+                round_start = time.perf_counter()
+                with tracer.span(
+                    "llm_round",
+                    iteration=iterations,
+                    messages=len(window),
+                    prompt_chars=sum(len(str(message.get("content") or "")) for message in window),
+                ) as span:
+                    backend = None
+                    async with aclosing(self._stream_round(window, [] if final_round else tools, session_id)) as chunks:
+                        async for backend, chunk in chunks:
+                            token = chunk['message'].get('content') or ""
+                            if token:
+                                content += token
+                                yield {"type": "token", "content": token}
+                            if chunk['message'].get('tool_calls'):
+                                tool_calls.extend(chunk['message']['tool_calls'])
+                            if chunk.get('done'):
+                                logger.debug("OllamaClient.chat_stream: final chunk: %s", Payload(chunk))
+                                self._record_chat_metrics(chunk, backend.model)
+                                span.set(
+                                    prompt_eval_count=chunk.get('prompt_eval_count') or 0,
+                                    eval_count=chunk.get('eval_count') or 0,
+                                    load_ms=(chunk.get('load_duration') or 0) / 1e6,
+                                    prompt_eval_ms=(chunk.get('prompt_eval_duration') or 0) / 1e6,
+                                    eval_ms=(chunk.get('eval_duration') or 0) / 1e6,
+                                )
+                    span.set(response_chars=len(content), tool_calls=len(tool_calls))
+                OLLAMA_CHAT_SECONDS.observe(time.perf_counter() - round_start, model=backend.model if backend else self.model)
+                if not tool_calls:
+                    logger.debug("No tool calls found in response")
+                    break
+                if final_round:
+                    content = content or f"Stopped after {self.max_tool_iterations} rounds of tool calls without a final answer."
+                    break
+                calls = []
+                for tool_call in tool_calls:
+                    logger.debug("OllamaClient detected tool call: %s", Payload(tool_call))
+                    # Extract the Function object from the ToolCall
+                    if hasattr(tool_call, 'function'):
+                        calls.append(tool_call.function)
+                    else:
+                        logger.warning("ToolCall does not have function attribute: %s", tool_call)
+                offered = {tool["function"]["name"] for tool in tools} | {READ_TOOL_RESULT}
+                if len(tools) < len(all_tools) and any(call.name not in offered for call in calls):
+                    # The selection may have hidden the tool the model wanted; offer everything from now on
+                    logger.info("Model asked for a tool outside the %d selected; offering all %d tools", len(tools), len(all_tools))
+                    TOOL_SELECTION_FALLBACKS.inc()
+                    tools = all_tools + [tool for tool in tools if tool["function"]["name"] == READ_TOOL_RESULT]
+                messages.append({
+                    "role": "assistant",
+                    "content": content,
+                    "tool_calls": [
+                        {"function": {"name": call.name, "arguments": dict(call.arguments or {})}}
+                        for call in calls
+                    ],
+                })
+                for call_id, function_obj in enumerate(calls):
+                    yield {
+                        "type": "tool_call_start",
+                        "id": call_id,
+                        "name": function_obj.name,
+                        "arguments": dict(function_obj.arguments or {}),
+                    }
+                results = [None] * len(calls)
+                with tracer.span("tool_calls", count=len(calls)):
+                    async with aclosing(self._call_mcp_tools(calls, mcp_servers, tool_index)) as finished:
+                        async for call_id, tool_result in finished:
+                            logger.debug("MCP tool result: %s", Payload(tool_result))
+                            name = calls[call_id].name
+                            if name == READ_TOOL_RESULT and name not in tool_index:
+                                results[call_id], ref = str(tool_result), None
+                            else:
+                                route = tool_index.get(name)
+                                results[call_id], ref = await self.tool_results.compact(
+                                    name, tool_result, route[1] if route else None
+                                )
+                            if ref and not any(tool["function"]["name"] == READ_TOOL_RESULT for tool in tools):
+                                tools.append(self.tool_results.tool_spec())
+                            yield {
+                                "type": "tool_call_end",
+                                "id": call_id,
+                                "name": name,
+                                "error": tool_result.get("error") if isinstance(tool_result, dict) else None,
+                                "ref": ref,
+                            }
+                # Tool results go back to the model in the order the calls were made
+                for function_obj, tool_result in zip(calls, results):
+                    messages.append({"role": "tool", "tool_name": function_obj.name, "content": tool_result})
+                results = None
+        except (asyncio.CancelledError, GeneratorExit):
+            self._record_interruption(messages, content, calls, results)
+            raise
+        TOOL_LOOP_ITERATIONS.observe(iterations)
+        yield {"type": "done", "content": content}
+
+    @staticmethod
+    def _record_interruption(messages: List[Dict[str, Any]], content: str, calls: List[Any], results: Optional[List[Optional[str]]]) -> None:
+        """Close off a turn that was cut short so ``messages`` stays a valid history."""
+        if results is not None:
+            for function_obj, tool_result in zip(calls, results):
+                messages.append({
+                    "role": "tool",
+                    "tool_name": function_obj.name,
+                    "content": tool_result if tool_result is not None else "Error: the turn was interrupted before this tool returned",
+                })
+        elif content:
+            messages.append({"role": "assistant", "content": content, "interrupted": True})
+
+    @staticmethod
+    def _selection_query(messages: List[Dict[str, Any]]) -> str:
+        """Return the text tools are ranked against: the latest two user messages."""
+        user_messages = [str(message.get("content") or "") for message in messages if message.get("role") == "user"]
+        return "\n".join(user_messages[-2:])
+
+    async def _embed(self, model: str, texts: List[str]) -> List[List[float]]:
+        """Embed texts with the least loaded Ollama backend."""
+        backend = self.pool.acquire()
+        try:
+            response = await backend.client.embed(model=model, input=texts)
+            return response["embeddings"]
+        except Exception as e:
+            if is_backend_error(e):
+                self.pool.record_failure(backend, e)
+            raise
+        finally:
+            self.pool.release(backend)
+
+    @staticmethod
+    def _has_stored_results(messages: List[Dict[str, Any]]) -> bool:
+        """Return True if the history holds a compacted tool result the model may want to read."""
+        return any(
+            message.get("role") == "tool" and READ_TOOL_RESULT in str(message.get("content") or "")
+            for message in messages
+        )
+
+    async def _stream_round(self, window: List[Dict[str, Any]], tools: List[Dict[str, Any]], session_id: Optional[str]) -> AsyncIterator[Tuple[OllamaBackend, Any]]:
+        """Stream one chat round from the backend pool, yielding ``(backend, chunk)`` pairs.
+
+        Connection and server errors before the first chunk fail over to
+        another backend; once output has been streamed the error is raised.
+        """
+        tried: List[OllamaBackend] = []
+        while True:
+            backend = self.pool.acquire(session_id, exclude=tried)
+            tried.append(backend)
+            started = False
+            try:
+                with tracer.span("ollama.chat", backend=backend.name, model=backend.model):
+                    stream = await backend.client.chat(
+                        model=backend.model,
+                        messages=window,
+                        tools=tools if tools else None,
+                        stream=True,
+                        keep_alive=self.keep_alive,
+                    )
+                    async with aclosing(stream):
+                        async for chunk in stream:
+                            started = True
+                            yield backend, chunk
+                self.pool.record_success(backend)
+                return
+            except Exception as e:
+                if not is_backend_error(e):
+                    raise
+                self.pool.record_failure(backend, e)
+                if started or len(tried) >= len(self.pool):
+                    raise
+                logger.warning("Failing over from Ollama backend %s", backend.name)
+            finally:
+                self.pool.release(backend)
+
+    def _record_chat_metrics(self, chunk: Any, model: str) -> None:
+        """Record the timings and token counts Ollama reports in its final chunk."""
+        if chunk.get('prompt_eval_duration'):
+            OLLAMA_PROMPT_EVAL_SECONDS.observe(chunk['prompt_eval_duration'] / 1e9, model=model)
+        if chunk.get('eval_duration'):
+            OLLAMA_EVAL_SECONDS.observe(chunk['eval_duration'] / 1e9, model=model)
+        if chunk.get('prompt_eval_count') is not None:
+            OLLAMA_PROMPT_TOKENS.observe(chunk['prompt_eval_count'], model=model)
+        if chunk.get('eval_count') is not None:
+            OLLAMA_EVAL_TOKENS.observe(chunk['eval_count'], model=model)
+
+    async def _call_mcp_tools(self, calls: List[Any], mcp_servers: Dict[str, Any], tool_index: Dict[str, Tuple[str, str]]) -> AsyncIterator[Tuple[int, Any]]:
+        """Run tool calls concurrently, yielding ``(index, result)`` pairs as each finishes.
+
+        At most ``max_parallel_tools`` calls run at once and each one is
+        abandoned with an error result after ``tool_call_timeout`` seconds.
+        """
+        semaphore = asyncio.Semaphore(self.max_parallel_tools)
+
+        async def run(call_id: int, function_obj: Any) -> Tuple[int, Any]:
+            async with semaphore:
+                try:
+                    return call_id, await asyncio.wait_for(
+                        self._call_mcp_tool(function_obj, mcp_servers, tool_index), self.tool_call_timeout
+                    )
+                except asyncio.TimeoutError:
+                    logger.error("MCP tool '%s' timed out after %ss", function_obj.name, self.tool_call_timeout)
+                    return call_id, {"error": f"Tool '{function_obj.name}' timed out after {self.tool_call_timeout}s"}
+
+        tasks = [asyncio.ensure_future(run(call_id, call)) for call_id, call in enumerate(calls)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _call_mcp_tool(self, tool_call: dict, mcp_servers: Dict[str, Any], tool_index: Dict[str, Tuple[str, str]]) -> Any:
+        """Call MCP tool based on parsed tool call, routed through the turn's ``tool_index``."""
         # Handle Function objects from Ollama client
         if hasattr(tool_call, 'name') and hasattr(tool_call, 'arguments'):
             tool_name = tool_call.name
             args = tool_call.arguments
-            logger.info("Function object - name: %s, arguments: %s", tool_name, args)
         else:
             # Fallback to dictionary format
             tool_name = tool_call.get('tool') or tool_call.get('name')
             args = tool_call.get('args', {}) or tool_call.get('arguments', {})
-            logger.info("Dictionary format - tool_name: %s, args: %s", tool_name, args)
-        logger.info("Final extracted tool_name: %s, args: %s", tool_name, args)
-        # For now, just use the first enabled MCP server
-        for server_name, server in mcp_servers.items():
-            if getattr(server, 'enabled', True):
-                try:
-                    logger.info("Calling MCP tool '%s' with args: %s", tool_name, args)
-                    return await server.call_tool(tool_name, args)
-                except Exception as e:
-                    logger.error("Error calling MCP tool '%s': %s", tool_name, e)
-                    return {"error": str(e)}
-        return {"error": f"No enabled MCP server found for tool '{tool_name}'"}
+        route = tool_index.get(tool_name)
+        if route is None and tool_name == READ_TOOL_RESULT:
+            args = args if isinstance(args, dict) else {}
+            return self.tool_results.read(str(args.get("ref", "")), args.get("offset", 0), args.get("length"))
+        if route is None or route[0] not in mcp_servers:
+            return {"error": f"No enabled MCP server found for tool '{tool_name}'"}
+        server_name, server_tool_name = route
+        with tracer.span(
+            "tool_call", tool=tool_name, server=server_name, arguments_chars=len(json.dumps(args or {}, default=str))
+        ) as span:
+            try:
+                logger.info("Calling MCP tool '%s' on server '%s' with args: %s", server_tool_name, server_name, Payload(args))
+                result = await mcp_servers[server_name].call_tool(server_tool_name, args)
+                span.set(result_chars=sum(len(getattr(item, "text", "") or "") for item in getattr(result, "content", None) or []))
+                return result
+            except Exception as e:
+                logger.error("Error calling MCP tool '%s': %s", tool_name, e)
+                span.set(error=str(e))
+                return {"error": str(e)}
 
 
 class LLMClientFactory:
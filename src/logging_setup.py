@@ -0,0 +1,146 @@
+"""
+Logging setup module for CPT Inspector.
+
+Routes all log records through a queue so handlers do their I/O on a
+background thread, and provides size-capped formatting for large payloads.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import reprlib
+from datetime import datetime
+from typing import Any, Dict, List
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Serialize a record and its extra attributes to JSON."""
+        data: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                data[key] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full."""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put a record on the queue, counting it as dropped if there is no room."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+class Payload:
+    """Log argument that renders a potentially large object lazily and size-capped.
+
+    Nothing is formatted unless the record is actually emitted. Bodies larger
+    than ``max_chars`` are truncated, and only ``sample_rate`` of them are
+    rendered at all; the rest are logged as a one-line size summary.
+    """
+
+    max_chars = 2000
+    sample_rate = 1.0
+
+    def __init__(self, value: Any):
+        """Wrap a value for deferred, bounded formatting."""
+        self.value = value
+
+    @staticmethod
+    def _approx_size(value: Any, limit: int) -> int:
+        """Estimate the rendered size by summing string lengths, stopping past ``limit``."""
+        size = 0
+        pending = [value]
+        while pending and size <= limit:
+            item = pending.pop()
+            if isinstance(item, (str, bytes)):
+                size += len(item)
+            elif isinstance(item, dict):
+                pending.extend(item.values())
+                size += 2 * len(item)
+            elif isinstance(item, (list, tuple, set)):
+                pending.extend(item)
+                size += len(item)
+            elif hasattr(item, "__dict__"):
+                pending.extend(vars(item).values())
+            else:
+                size += 8
+        return size
+
+    def __str__(self) -> str:
+        """Render the value, truncated or sampled out when it is large."""
+        limit = self.max_chars
+        size = self._approx_size(self.value, limit * 10)
+        if size > limit and random.random() >= self.sample_rate:
+            return f"<{type(self.value).__name__}, ~{size}+ chars, not sampled>"
+        if isinstance(self.value, str):
+            text = self.value
+        else:
+            value = self.value.model_dump() if hasattr(self.value, "model_dump") else self.value
+            formatter = reprlib.Repr()
+            formatter.maxlevel = 6
+            formatter.maxdict = formatter.maxlist = formatter.maxtuple = 50
+            formatter.maxstring = formatter.maxother = limit
+            text = formatter.repr(value)
+        if len(text) > limit:
+            return f"{text[:limit]}... [truncated, ~{size}+ chars]"
+        return text
+
+
+def setup_logging(config: Dict[str, Any]) -> logging.handlers.QueueListener:
+    """Configure queue-based logging from the ``logging`` config section.
+
+    Returns the started listener; call ``stop()`` on it at shutdown to flush.
+    """
+    level = config.get("level", "INFO")
+    log_file = config.get("file", "logs/app.log")
+    if config.get("format", "text") == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if log_file:
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(config.get("queue_size", 10000))
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    root.setLevel(level)
+    logging.getLogger("cpt-inspector").setLevel(level)
+    for name, logger_level in config.get("levels", {}).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    Payload.max_chars = config.get("max_payload_chars", 2000)
+    Payload.sample_rate = config.get("payload_sample_rate", 1.0)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -4,80 +4,294 @@ MCP Client module for CPT Inspector.
 Provides client implementation for Model Context Protocol servers.
 """
 
+import asyncio
+import json
 import logging
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
 
-from mcp import ClientSession
+from mcp import ClientSession, McpError, types
 from mcp.client.streamable_http import streamablehttp_client
+from pydantic import AnyUrl
+
+from src.logging_setup import Payload
+from src.metrics import MCP_CALL_TOOL_SECONDS, MCP_LIST_TOOLS_SECONDS
+from src.resource_cache import CachedPayload, ResourceCache
+from src.result_cache import ToolResultCache
+from src.single_flight import SingleFlight
+from src.tracing import tracer
 
 logger = logging.getLogger("cpt-inspector.mcp")
 
+# Resource cache key for the serialized resource listing
+RESOURCE_LIST_KEY = "resources/list"
 
-class MCPClient:
-    """MCP client for communicating with MCP servers."""
 
-    def __init__(self, url: str):
-        """Initialize MCP client with server URL."""
+def resource_key(resource_name: str) -> str:
+    """Return a resource URI normalized the way servers echo it in notifications."""
+    try:
+        return str(AnyUrl(resource_name))
+    except ValueError:
+        return resource_name
+
+
+class PooledSession:
+    """An initialized MCP session owned by a dedicated background task.
+
+    The streamable HTTP transport and ClientSession are entered and exited
+    inside the same task, as anyio requires, and the task finishes as soon
+    as the connection fails, which marks the session as dead.
+    """
+
+    def __init__(self, url: str, message_handler: Callable[[Any], Any]):
+        """Initialize an unopened session for the given server URL."""
         self.url = url
+        self.message_handler = message_handler
         self.session: Optional[ClientSession] = None
-        self._client_context = None
+        self.capabilities: Optional[types.ServerCapabilities] = None
+        self.in_use = 0
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
 
-    async def _get_session(self) -> ClientSession:
-        """Get or create MCP client session."""
+    @property
+    def alive(self) -> bool:
+        """Whether the session is initialized and its connection is still open."""
+        return (
+            self.session is not None
+            and not self._closing.is_set()
+            and self._task is not None
+            and not self._task.done()
+        )
+
+    async def _run(self) -> None:
+        try:
+            async with streamablehttp_client(self.url) as (read_stream, write_stream, _):
+                async with ClientSession(
+                    read_stream, write_stream, message_handler=self.message_handler
+                ) as session:
+                    initialize_result = await session.initialize()
+                    self.capabilities = initialize_result.capabilities
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            # Task groups wrap the transport's error; keep the one that explains the failure
+            while getattr(e, "exceptions", None):
+                e = e.exceptions[0]
+            self._error = e
+            if self.session is not None:
+                logger.warning("MCP session with %s died: %s", self.url, e)
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def open(self, timeout: float) -> None:
+        """Connect and initialize the session, raising if that fails."""
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise ConnectionError(f"Timed out connecting to MCP server {self.url} after {timeout}s")
         if self.session is None:
+            raise ConnectionError(f"Failed to establish MCP session with {self.url}: {self._error}")
+
+    async def run(self, request: Awaitable[Any]) -> Any:
+        """Await a request on this session, failing fast if the connection dies meanwhile."""
+        request_task = asyncio.ensure_future(request)
+        try:
+            await asyncio.wait({request_task, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            request_task.cancel()
+            raise
+        if not request_task.done():
+            request_task.cancel()
+            raise ConnectionError(f"MCP session with {self.url} closed during request")
+        return request_task.result()
+
+    async def close(self) -> None:
+        """Close the session and wait for its owner task to finish."""
+        self._closing.set()
+        if self._task is not None and not self._task.done():
             try:
-                logger.info("Creating streamable HTTP client for URL: %s", self.url)
-                
-                # Test basic connectivity first
-                import httpx
-                try:
-                    async with httpx.AsyncClient() as client:
-                        response = await client.get(self.url, timeout=5.0)
-                        logger.info("HTTP connectivity test successful: %s", response.status_code)
-                except Exception as http_error:
-                    logger.warning("HTTP connectivity test failed: %s", http_error)
-                
-                # Create streamable HTTP client connection
-                self._client_context = streamablehttp_client(self.url)
-                logger.debug("Client context created, entering context")
-                read_stream, write_stream, _ = await self._client_context.__aenter__()
-                logger.debug("Got read/write streams from client context")
-                
-                # Create client session
-                logger.debug("Creating ClientSession with streams")
-                self.session = ClientSession(read_stream, write_stream)
-                logger.debug("Entering session context")
-                await self.session.__aenter__()
-                
-                # Initialize the session
-                logger.debug("Initializing session")
-                await self.session.initialize()
-                logger.info("MCP session established with %s", self.url)
-            except Exception as e:
-                logger.error("Failed to establish MCP session with %s: %s", self.url, e)
-                logger.error("Exception type: %s", type(e).__name__)
-                import traceback
-                logger.error("Traceback: %s", traceback.format_exc())
-                # Clean up on error
-                if self._client_context:
-                    try:
-                        await self._client_context.__aexit__(None, None, None)
-                    except:
-                        pass
-                    self._client_context = None
-                raise
-        return self.session
+                await asyncio.wait_for(self._task, 5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+
+
+class MCPClient:
+    """MCP client for communicating with MCP servers.
+
+    Keeps a pool of up to ``pool_size`` initialized sessions and hands each
+    request the least busy one. Concurrent callers share one in-flight
+    connection attempt, dead sessions are evicted, and failed connection
+    attempts back off exponentially up to ``max_backoff`` seconds.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = 2,
+        connect_timeout: float = 10.0,
+        max_backoff: float = 30.0,
+        result_cache: Optional[Any] = None,
+        cache_ttls: Optional[Dict[str, float]] = None,
+        resource_cache_ttl: float = 60.0,
+        resource_cache_bytes: int = 16 * 1024 * 1024,
+        name: Optional[str] = None,
+        coalesce_calls: bool = True,
+    ):
+        """Initialize MCP client with server URL, pool and cache settings.
+
+        Only tools listed in ``cache_ttls`` (tool name -> seconds) have their
+        results memoized in ``result_cache``. Resource reads are cached for
+        ``resource_cache_ttl`` seconds, or until the server reports a change,
+        and at most ``resource_cache_bytes`` of them are kept.
+        ``name`` labels this server in metrics and defaults to the URL.
+        With ``coalesce_calls``, concurrent identical tool calls share one request.
+        """
+        self.url = url
+        self.name = name or url
+        self.resource_cache = ResourceCache(ttl=resource_cache_ttl, max_bytes=resource_cache_bytes)
+        self._subscriptions: Set[str] = set()
+        self._supports_subscribe = False
+        self.result_cache = result_cache
+        self.cache_ttls = cache_ttls or {}
+        self.pool_size = max(1, pool_size)
+        self.connect_timeout = connect_timeout
+        self.max_backoff = max_backoff
+        self._sessions: List[PooledSession] = []
+        self._connecting: Optional[asyncio.Task] = None
+        self._closed = False
+        self._failures = 0
+        self._retry_at = 0.0
+        self._tools_changed_callbacks: List[Callable[[], None]] = []
+        self._tool_calls = SingleFlight("mcp_call_tool") if coalesce_calls else None
+
+    def on_tools_changed(self, callback: Callable[[], None]) -> None:
+        """Register a callback invoked when the server reports a tool list change."""
+        self._tools_changed_callbacks.append(callback)
+
+    async def _handle_message(self, message: Any) -> None:
+        """Dispatch server notifications received on the session."""
+        if not isinstance(message, types.ServerNotification):
+            return
+        notification = message.root
+        if isinstance(notification, types.ToolListChangedNotification):
+            logger.info("Tool list changed on MCP server %s", self.url)
+            for callback in self._tools_changed_callbacks:
+                callback()
+        elif isinstance(notification, types.ResourceUpdatedNotification):
+            logger.info("Resource %s updated on MCP server %s", notification.params.uri, self.url)
+            self.resource_cache.invalidate(str(notification.params.uri))
+        elif isinstance(notification, types.ResourceListChangedNotification):
+            logger.info("Resource list changed on MCP server %s", self.url)
+            self.resource_cache.invalidate(RESOURCE_LIST_KEY)
+
+    def _forget_subscriptions(self) -> None:
+        """Drop resources whose update notifications may have been lost with a session."""
+        for uri in self._subscriptions:
+            self.resource_cache.invalidate(uri)
+        self._subscriptions.clear()
+
+    async def _connect(self) -> PooledSession:
+        """Open one new pooled session, tracking failures for backoff."""
+        logger.info("Opening MCP session with %s", self.url)
+        pooled = PooledSession(self.url, self._handle_message)
+        try:
+            await pooled.open(self.connect_timeout)
+        except Exception as e:
+            self._failures += 1
+            backoff = min(self.max_backoff, 2 ** (self._failures - 1))
+            self._retry_at = time.monotonic() + backoff
+            logger.error("MCP connection attempt to %s failed: %s (retrying in %ss)", self.url, e, backoff)
+            raise
+        if self._closed:
+            # close() ran while this session was opening
+            await pooled.close()
+            raise ConnectionError(f"MCP client for {self.url} is closed")
+        self._failures = 0
+        self._retry_at = 0.0
+        resources = pooled.capabilities.resources if pooled.capabilities else None
+        self._supports_subscribe = bool(resources and resources.subscribe)
+        self._sessions.append(pooled)
+        logger.info("MCP session established with %s (%d in pool)", self.url, len(self._sessions))
+        return pooled
+
+    def _connect_once(self) -> "asyncio.Task":
+        """Return the in-flight connection attempt, starting one if needed."""
+        if self._connecting is None or self._connecting.done():
+            self._connecting = asyncio.create_task(self._connect())
+            # Background growth attempts may never be awaited
+            self._connecting.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._connecting
+
+    async def _get_session(self) -> PooledSession:
+        """Return the least busy live session, connecting or growing the pool as needed."""
+        if self._closed:
+            raise ConnectionError(f"MCP client for {self.url} is closed")
+        for dead in [pooled for pooled in self._sessions if not pooled.alive]:
+            logger.info("Evicting dead MCP session with %s", self.url)
+            self._sessions.remove(dead)
+            self._forget_subscriptions()
+            await dead.close()
+        if self._sessions:
+            pooled = min(self._sessions, key=lambda candidate: candidate.in_use)
+            if pooled.in_use and len(self._sessions) < self.pool_size and time.monotonic() >= self._retry_at:
+                self._connect_once()
+            return pooled
+        if time.monotonic() < self._retry_at:
+            raise ConnectionError(
+                f"MCP server {self.url} unavailable, next reconnect in "
+                f"{self._retry_at - time.monotonic():.1f}s"
+            )
+        return await asyncio.shield(self._connect_once())
+
+    async def connect(self) -> None:
+        """Open a pooled session now rather than on the first request."""
+        await self._get_session()
+
+    async def _request(self, operation: Callable[[ClientSession], Awaitable[Any]]) -> Any:
+        """Run one request on a pooled session, evicting the session on transport errors."""
+        pooled = await self._get_session()
+        pooled.in_use += 1
+        try:
+            return await pooled.run(operation(pooled.session))
+        except McpError:
+            # The server answered with an error, so the session itself is fine
+            raise
+        except Exception:
+            if pooled in self._sessions:
+                logger.warning("Evicting MCP session with %s after a transport error", self.url)
+                self._sessions.remove(pooled)
+                self._forget_subscriptions()
+                await pooled.close()
+            raise
+        finally:
+            pooled.in_use -= 1
+
+    async def ping(self) -> None:
+        """Check that the server answers on a pooled session, raising if it does not."""
+        with tracer.span("mcp.ping", server=self.name):
+            await self._request(lambda session: session.send_ping())
 
     async def list_tools(self) -> List[Dict[str, Any]]:
         """List available tools from the MCP server."""
+        with tracer.span("mcp.list_tools", server=self.name):
+            return await self._list_tools()
+
+    async def _list_tools(self) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
         try:
             logger.debug("Attempting to list tools from MCP server: %s", self.url)
-            session = await self._get_session()
-            logger.debug("Session established, calling list_tools")
-            tools_response = await session.list_tools()
+            tools_response = await self._request(lambda session: session.list_tools())
+            MCP_LIST_TOOLS_SECONDS.observe(time.perf_counter() - start, server=self.name, status="ok")
             logger.info("Retrieved %d tools from MCP server", len(tools_response.tools))
             return tools_response
         except Exception as e:
+            MCP_LIST_TOOLS_SECONDS.observe(time.perf_counter() - start, server=self.name, status="error")
             logger.error("Error listing tools from MCP server %s: %s", self.url, e)
             logger.error("Exception type: %s", type(e).__name__)
             import traceback
@@ -85,21 +299,47 @@ class MCPClient:
             return []
 
     async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
-        """Call a specific tool on the MCP server."""
+        """Call a specific tool on the MCP server, serving cacheable tools from the result cache."""
+        with tracer.span("mcp.call_tool", server=self.name, tool=tool_name) as span:
+            if self._tool_calls is None:
+                return await self._call_tool(tool_name, arguments, span)
+            return await self._tool_calls.do(
+                ToolResultCache.key(self.url, tool_name, arguments),
+                lambda: self._call_tool(tool_name, arguments, span),
+            )
+
+    async def _call_tool(self, tool_name: str, arguments: Dict[str, Any], span: Any) -> Any:
+        ttl = self.cache_ttls.get(tool_name) if self.result_cache is not None else None
+        if ttl:
+            cache_key = self.result_cache.key(self.url, tool_name, arguments)
+            cached = await self.result_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Tool result cache hit for '%s'", tool_name)
+                span.set(cache="hit", result_bytes=len(cached))
+                return types.CallToolResult.model_validate_json(cached)
+            span.set(cache="miss")
+        start = time.perf_counter()
         try:
-            session = await self._get_session()
-            result = await session.call_tool(tool_name, arguments)
-            logger.debug("Tool call result: %s", result)
+            result = await self._request(lambda session: session.call_tool(tool_name, arguments))
+            MCP_CALL_TOOL_SECONDS.observe(
+                time.perf_counter() - start,
+                server=self.name,
+                tool=tool_name,
+                status="tool_error" if result.isError else "ok",
+            )
+            logger.debug("Tool call result: %s", Payload(result))
+            if ttl and not result.isError:
+                await self.result_cache.put(cache_key, result.model_dump_json(), ttl)
             return result
         except Exception as e:
+            MCP_CALL_TOOL_SECONDS.observe(time.perf_counter() - start, server=self.name, tool=tool_name, status="error")
             logger.error("Error calling tool '%s': %s", tool_name, e)
             raise
 
     async def list_resources(self) -> List[Dict[str, Any]]:
         """List available resources from the MCP server."""
         try:
-            session = await self._get_session()
-            resources_response = await session.list_resources()
+            resources_response = await self._request(lambda session: session.list_resources())
             logger.debug("Retrieved %d resources from MCP server", len(resources_response.resources))
             return [resource.model_dump() for resource in resources_response.resources]
         except Exception as e:
@@ -109,31 +349,55 @@ class MCPClient:
     async def get_resource(self, resource_name: str) -> Any:
         """Get a specific resource from the MCP server."""
         try:
-            session = await self._get_session()
-            resource = await session.read_resource(resource_name)
-            logger.debug("Resource retrieved: %s", resource)
+            resource = await self._request(lambda session: session.read_resource(resource_name))
+            logger.debug("Resource retrieved: %s", Payload(resource))
             return resource
         except Exception as e:
             logger.error("Error getting resource '%s': %s", resource_name, e)
             raise
 
-    async def close(self):
-        """Close the MCP client session."""
-        if self.session:
+    async def list_resources_payload(self) -> CachedPayload:
+        """Return the serialized resource listing, from cache when fresh."""
+        cached = self.resource_cache.get(RESOURCE_LIST_KEY)
+        if cached is not None:
+            return cached
+        resources_response = await self._request(lambda session: session.list_resources())
+        body = json.dumps([resource.model_dump(mode="json") for resource in resources_response.resources])
+        return self.resource_cache.put(RESOURCE_LIST_KEY, body)
+
+    async def get_resource_payload(self, resource_name: str) -> CachedPayload:
+        """Return a serialized resource, from cache when fresh.
+
+        When the server supports it, the resource is subscribed to so that
+        ``notifications/resources/updated`` invalidates the cached copy.
+        """
+        key = resource_key(resource_name)
+        cached = self.resource_cache.get(key)
+        if cached is not None:
+            return cached
+        resource = await self._request(lambda session: session.read_resource(resource_name))
+        if self._supports_subscribe and key not in self._subscriptions:
             try:
-                await self.session.__aexit__(None, None, None)
-                self.session = None
-                logger.info("MCP session closed")
+                await self._request(lambda session: session.subscribe_resource(resource_name))
+                self._subscriptions.add(key)
             except Exception as e:
-                logger.error("Error closing MCP session: %s", e)
-        
-        if self._client_context:
+                logger.warning("Could not subscribe to resource '%s': %s", resource_name, e)
+        return self.resource_cache.put(key, resource.model_dump_json())
+
+    async def close(self):
+        """Close every pooled MCP session; later requests fail instead of reconnecting."""
+        self._closed = True
+        if self._connecting is not None and not self._connecting.done():
+            self._connecting.cancel()
+        sessions, self._sessions = self._sessions, []
+        self._forget_subscriptions()
+        for pooled in sessions:
             try:
-                await self._client_context.__aexit__(None, None, None)
-                self._client_context = None
-                logger.info("MCP client context closed")
+                await pooled.close()
             except Exception as e:
-                logger.error("Error closing MCP client context: %s", e)
+                logger.error("Error closing MCP session: %s", e)
+        if sessions:
+            logger.info("Closed %d MCP sessions with %s", len(sessions), self.url)
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -0,0 +1,246 @@
+"""
+Metrics module for CPT Inspector.
+
+A small in-process metrics registry rendered in the Prometheus text
+exposition format, so no external client library or service is needed.
+"""
+
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Latency buckets in seconds, from fast cache hits to slow tool-heavy turns
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 2048, 4096, 8192, 16384, 32768)
+ITERATION_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class for labelled metrics."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Initialize a metric with its name, help text and label names."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        """Return the exposition lines for this metric's samples."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Render the metric with its HELP and TYPE header."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing counter."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Initialize a counter."""
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increase the counter for a label set."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        """Return one sample per label set."""
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in self._values.items()]
+
+
+class Gauge(Metric):
+    """Value that can go up and down, optionally read from a callback at scrape time."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Initialize a gauge."""
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the gauge for a label set."""
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increase the gauge for a label set."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        """Decrease the gauge for a label set."""
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read an unlabelled gauge's value from ``function`` at scrape time."""
+        self._function = function
+
+    def samples(self) -> List[str]:
+        """Return one sample per label set."""
+        if self._function is not None:
+            return [f"{self.name} {_format_value(self._function())}"]
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in self._values.items()]
+
+
+class Histogram(Metric):
+    """Cumulative histogram with fixed buckets."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        """Initialize a histogram with upper bucket bounds."""
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label set -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelKey, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation for a label set."""
+        key = self._key(labels)
+        counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        self._values[key] = (counts, total + value, count + 1)
+
+    def samples(self) -> List[str]:
+        """Return cumulative bucket, sum and count samples per label set."""
+        lines = []
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric, returning the already registered one if the name exists."""
+        return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+CHAT_REQUEST_SECONDS = registry.register(Histogram(
+    "cpt_chat_request_duration_seconds", "End-to-end chat request latency.", ["endpoint"]
+))
+INFLIGHT_REQUESTS = registry.register(Gauge(
+    "cpt_inflight_requests", "Chat requests currently being processed.", ["endpoint"]
+))
+ACTIVE_SESSIONS = registry.register(Gauge(
+    "cpt_active_sessions", "Chat sessions held by the session store."
+))
+ADMISSION_ACTIVE = registry.register(Gauge(
+    "cpt_admission_active_turns", "Chat turns holding an admission slot."
+))
+ADMISSION_QUEUE_DEPTH = registry.register(Gauge(
+    "cpt_admission_queue_depth", "Chat turns waiting for an admission slot."
+))
+ADMISSION_WAIT_SECONDS = registry.register(Histogram(
+    "cpt_admission_wait_seconds", "Time chat turns waited in the admission queue."
+))
+ADMISSION_REJECTED = registry.register(Counter(
+    "cpt_admission_rejected_total", "Chat turns rejected by admission control.", ["reason"]
+))
+TOOL_LOOP_ITERATIONS = registry.register(Histogram(
+    "cpt_tool_loop_iterations", "LLM rounds per chat turn.", buckets=ITERATION_BUCKETS
+))
+TOOL_SELECTIONS = registry.register(Counter(
+    "cpt_tool_selections_total", "Per-turn tool subset selections by ranking method.", ["method"]
+))
+TOOL_SELECTION_FALLBACKS = registry.register(Counter(
+    "cpt_tool_selection_fallbacks_total", "Turns that fell back to the full tool set after the model asked for an unselected tool."
+))
+OLLAMA_CHAT_SECONDS = registry.register(Histogram(
+    "cpt_ollama_chat_duration_seconds", "Wall-clock duration of one Ollama chat call.", ["model"]
+))
+OLLAMA_PROMPT_EVAL_SECONDS = registry.register(Histogram(
+    "cpt_ollama_prompt_eval_duration_seconds", "Prompt prefill time reported by Ollama.", ["model"]
+))
+OLLAMA_EVAL_SECONDS = registry.register(Histogram(
+    "cpt_ollama_eval_duration_seconds", "Generation time reported by Ollama.", ["model"]
+))
+OLLAMA_PROMPT_TOKENS = registry.register(Histogram(
+    "cpt_ollama_prompt_tokens", "Prompt tokens evaluated per Ollama call.", ["model"], buckets=TOKEN_BUCKETS
+))
+OLLAMA_EVAL_TOKENS = registry.register(Histogram(
+    "cpt_ollama_eval_tokens", "Tokens generated per Ollama call.", ["model"], buckets=TOKEN_BUCKETS
+))
+OLLAMA_OUTSTANDING_REQUESTS = registry.register(Gauge(
+    "cpt_ollama_outstanding_requests", "Chat calls in flight per Ollama backend.", ["backend"]
+))
+OLLAMA_BACKEND_FAILURES = registry.register(Counter(
+    "cpt_ollama_backend_failures_total", "Connection or server errors per Ollama backend.", ["backend"]
+))
+MCP_CALL_TOOL_SECONDS = registry.register(Histogram(
+    "cpt_mcp_call_tool_duration_seconds", "MCP call_tool latency.", ["server", "tool", "status"]
+))
+MCP_LIST_TOOLS_SECONDS = registry.register(Histogram(
+    "cpt_mcp_list_tools_duration_seconds", "MCP list_tools latency.", ["server", "status"]
+))
+TOOL_RESULT_CACHE_LOOKUPS = registry.register(Counter(
+    "cpt_tool_result_cache_lookups_total", "Tool result cache lookups.", ["result"]
+))
+COALESCED_REQUESTS = registry.register(Counter(
+    "cpt_coalesced_requests_total", "Requests served by joining an identical in-flight call.", ["kind"]
+))
+JOB_ITEMS = registry.register(Counter(
+    "cpt_job_items_total", "Batch job items finished, by outcome.", ["status"]
+))
+JOB_QUEUE_DEPTH = registry.register(Gauge(
+    "cpt_job_queue_depth", "Batch job items waiting for a worker."
+))
@@ -0,0 +1,154 @@
+"""
+Ollama backend pool module for CPT Inspector.
+
+Spreads chat requests over several Ollama endpoints by least outstanding
+requests, keeps sessions on the backend that already holds their context,
+and takes failing backends out of rotation with exponential backoff.
+"""
+
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+from ollama import AsyncClient, ResponseError
+
+from src.metrics import OLLAMA_BACKEND_FAILURES, OLLAMA_OUTSTANDING_REQUESTS
+
+logger = logging.getLogger("cpt-inspector.ollama-pool")
+
+
+def is_backend_error(error: BaseException) -> bool:
+    """Return True for errors that mean the backend, not the request, is at fault."""
+    if isinstance(error, (ConnectionError, httpx.TransportError)):
+        return True
+    return isinstance(error, ResponseError) and error.status_code >= 500
+
+
+class OllamaBackend:
+    """One Ollama endpoint serving one model."""
+
+    def __init__(self, url: str, model: str, name: Optional[str] = None, weight: float = 1.0, timeout: float = 500):
+        """Initialize a backend; ``weight`` scales its share of outstanding requests."""
+        self.url = url
+        self.model = model
+        self.name = name or url
+        self.weight = max(weight, 0.01)
+        self.client = AsyncClient(host=url, timeout=timeout)
+        self.outstanding = 0
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_error: Optional[str] = None
+
+    def available(self, now: float) -> bool:
+        """Return True unless the backend is backing off after failures."""
+        return now >= self.retry_at
+
+    def load(self) -> float:
+        """Return outstanding requests relative to the backend's weight."""
+        return self.outstanding / self.weight
+
+
+class OllamaPool:
+    """Least-outstanding-requests router over Ollama backends with session affinity.
+
+    A session stays on its previous backend while that backend is healthy
+    and has at most ``affinity_slack`` more outstanding requests than the
+    least loaded one. A backend that fails is skipped for an exponentially
+    growing period, up to ``max_backoff`` seconds.
+    """
+
+    def __init__(
+        self,
+        backends: List[OllamaBackend],
+        affinity_slack: int = 2,
+        max_backoff: float = 30.0,
+        max_sessions: int = 10000,
+    ):
+        """Initialize the pool; ``max_sessions`` bounds the affinity table."""
+        if not backends:
+            raise ValueError("OllamaPool needs at least one backend")
+        self.backends = backends
+        self.affinity_slack = affinity_slack
+        self.max_backoff = max_backoff
+        self.max_sessions = max_sessions
+        self._affinity: "OrderedDict[str, OllamaBackend]" = OrderedDict()
+        self._rotation = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def acquire(self, session_id: Optional[str] = None, exclude: Iterable[OllamaBackend] = ()) -> OllamaBackend:
+        """Pick a backend for a request and count it as outstanding until ``release``."""
+        excluded = set(exclude)
+        candidates = [backend for backend in self.backends if backend not in excluded] or self.backends
+        now = time.monotonic()
+        healthy = [backend for backend in candidates if backend.available(now)]
+        if healthy:
+            # Rotate before taking the minimum so ties are spread evenly
+            offset = next(self._rotation) % len(healthy)
+            rotated = healthy[offset:] + healthy[:offset]
+            backend = min(rotated, key=lambda candidate: candidate.load())
+            preferred = self._affinity.get(session_id) if session_id else None
+            if preferred in healthy and preferred.load() <= backend.load() + self.affinity_slack:
+                backend = preferred
+        else:
+            # Everything is backing off; try the one that will recover first
+            backend = min(candidates, key=lambda candidate: candidate.retry_at)
+        if session_id:
+            self._affinity[session_id] = backend
+            self._affinity.move_to_end(session_id)
+            while len(self._affinity) > self.max_sessions:
+                self._affinity.popitem(last=False)
+        backend.outstanding += 1
+        OLLAMA_OUTSTANDING_REQUESTS.set(backend.outstanding, backend=backend.name)
+        return backend
+
+    def release(self, backend: OllamaBackend) -> None:
+        """Stop counting a request as outstanding on a backend."""
+        backend.outstanding -= 1
+        OLLAMA_OUTSTANDING_REQUESTS.set(backend.outstanding, backend=backend.name)
+
+    def record_success(self, backend: OllamaBackend) -> None:
+        """Put a backend back into full rotation."""
+        if backend.failures:
+            logger.info("Ollama backend %s recovered", backend.name)
+        backend.failures = 0
+        backend.retry_at = 0.0
+        backend.last_error = None
+
+    def record_failure(self, backend: OllamaBackend, error: BaseException) -> None:
+        """Take a backend out of rotation for a backoff period."""
+        backend.last_error = str(error) or type(error).__name__
+        OLLAMA_BACKEND_FAILURES.inc(backend=backend.name)
+        now = time.monotonic()
+        if not backend.available(now):
+            # Requests already in flight when it went down do not extend the backoff
+            return
+        backend.failures += 1
+        backoff = min(2 ** (backend.failures - 1), self.max_backoff)
+        backend.retry_at = now + backoff
+        logger.warning(
+            "Ollama backend %s failed (%s); skipping it for %.0fs", backend.name, backend.last_error, backoff
+        )
+
+    def forget(self, session_id: str) -> None:
+        """Drop a session's backend affinity."""
+        self._affinity.pop(session_id, None)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return the state of every backend."""
+        now = time.monotonic()
+        return [{
+            "name": backend.name,
+            "url": backend.url,
+            "model": backend.model,
+            "weight": backend.weight,
+            "status": "healthy" if backend.available(now) else "backoff",
+            "outstanding": backend.outstanding,
+            "failures": backend.failures,
+            "last_error": backend.last_error,
+            "retry_in_s": round(max(backend.retry_at - now, 0), 1),
+        } for backend in self.backends]
@@ -0,0 +1,88 @@
+"""
+Resource cache module for CPT Inspector.
+
+Keeps serialized MCP resource payloads with their ETags so repeated reads
+are served from memory.
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger("cpt-inspector.resources")
+
+
+class CachedPayload(NamedTuple):
+    """A serialized JSON payload and its strong ETag."""
+
+    body: str
+    etag: str
+    cached_at: float
+
+
+class ResourceCache:
+    """Byte-bounded LRU of serialized resource payloads with a TTL, invalidated per key."""
+
+    def __init__(self, ttl: float = 60.0, max_bytes: int = 16 * 1024 * 1024):
+        """Initialize an empty cache; entries expire after ``ttl`` seconds (0 disables expiry)."""
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedPayload]" = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def _size(entry: CachedPayload) -> int:
+        return len(entry.body.encode("utf-8"))
+
+    def _expired(self, entry: CachedPayload, now: float) -> bool:
+        return bool(self.ttl) and now - entry.cached_at >= self.ttl
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= self._size(entry)
+
+    def get(self, key: str) -> Optional[CachedPayload]:
+        """Return the cached payload for a key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry, time.monotonic()):
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, body: str) -> CachedPayload:
+        """Store a serialized payload and return it with its ETag.
+
+        Expired entries are dropped first, then the least recently used
+        until the cache fits ``max_bytes``. A payload larger than
+        ``max_bytes`` is returned without being cached.
+        """
+        etag = '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+        now = time.monotonic()
+        entry = CachedPayload(body, etag, now)
+        self._discard(key)
+        for expired in [name for name, cached in self._entries.items() if self._expired(cached, now)]:
+            self._discard(expired)
+        size = self._size(entry)
+        if self.max_bytes and size > self.max_bytes:
+            return entry
+        self._entries[key] = entry
+        self._bytes += size
+        while self.max_bytes and self._bytes > self.max_bytes:
+            evicted, _ = next(iter(self._entries.items()))
+            self._discard(evicted)
+        return entry
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one key, or every key."""
+        if key is None:
+            self._entries.clear()
+            self._bytes = 0
+        else:
+            self._discard(key)
+        logger.debug("Resource cache invalidated for %s", key or "all resources")
@@ -0,0 +1,224 @@
+"""
+Tool result cache module for CPT Inspector.
+
+Memoizes results of idempotent MCP tool calls in a byte-bounded LRU, with
+an optional on-disk tier that survives restarts.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from src.metrics import TOOL_RESULT_CACHE_LOOKUPS
+
+logger = logging.getLogger("cpt-inspector.cache")
+
+
+class ToolResultCache:
+    """Byte-bounded LRU cache of serialized tool results with per-entry TTLs.
+
+    The optional disk tier is swept every ``disk_sweep_interval`` seconds, and
+    as soon as writes may have pushed it past ``disk_max_bytes``: expired files
+    are deleted, then the least recently used until it is 90% full.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_path: Optional[str] = None,
+        disk_max_bytes: int = 256 * 1024 * 1024,
+        disk_sweep_interval: float = 300.0,
+    ):
+        """Initialize the cache; ``disk_path`` enables the on-disk tier."""
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_sweep_interval = disk_sweep_interval
+        # Bytes on disk as of the last sweep plus those written since
+        self._disk_bytes = 0
+        self._next_sweep = 0.0
+        self._sweeping = False
+        if disk_path:
+            os.makedirs(disk_path, exist_ok=True)
+        # key -> (expires_at, payload, size in bytes)
+        self._entries: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(server: str, tool_name: str, arguments: Dict[str, Any]) -> str:
+        """Build a cache key from the server, tool name and canonicalized arguments."""
+        canonical = json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(f"{server}\0{tool_name}\0{canonical}".encode("utf-8")).hexdigest()
+
+    def _disk_file(self, key: str) -> str:
+        return os.path.join(self.disk_path, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, str]]:
+        try:
+            with open(self._disk_file(key), "r", encoding="utf-8") as f:
+                expires_at = float(f.readline())
+                payload = f.read()
+        except (OSError, ValueError):
+            return None
+        if expires_at < time.time():
+            try:
+                os.remove(self._disk_file(key))
+            except OSError:
+                pass
+            return None
+        try:
+            # Disk hits count as use for the sweep's LRU order
+            os.utime(self._disk_file(key))
+        except OSError:
+            pass
+        return expires_at, payload
+
+    def _write_disk(self, key: str, expires_at: float, payload: str) -> None:
+        path = self._disk_file(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(f"{expires_at}\n")
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Failed to write tool result cache file %s: %s", path, e)
+
+    def _sweep_disk(self) -> int:
+        """Delete expired and least recently used files; return the bytes left on disk."""
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.disk_path):
+            try:
+                stat = entry.stat()
+                if entry.name.endswith(".tmp"):
+                    # Left behind by a write that never finished
+                    if stat.st_mtime < now - self.disk_sweep_interval:
+                        os.remove(entry.path)
+                    continue
+                if not entry.name.endswith(".json"):
+                    continue
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    expires_at = float(f.readline())
+                if expires_at < now:
+                    os.remove(entry.path)
+                    continue
+            except (OSError, ValueError):
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        if self.disk_max_bytes and total > self.disk_max_bytes:
+            # Leave headroom so a full tier is not rescanned on every write
+            target = self.disk_max_bytes * 0.9
+            for _, size, path in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+        if removed:
+            logger.info("Evicted %d tool result cache files from %s", removed, self.disk_path)
+        return total
+
+    async def _maybe_sweep_disk(self) -> None:
+        over_limit = self.disk_max_bytes and self._disk_bytes > self.disk_max_bytes
+        if self._sweeping or not (over_limit or time.monotonic() >= self._next_sweep):
+            return
+        self._sweeping = True
+        try:
+            self._disk_bytes = await asyncio.to_thread(self._sweep_disk)
+        except OSError as e:
+            logger.warning("Failed to sweep tool result cache directory %s: %s", self.disk_path, e)
+        finally:
+            self._next_sweep = time.monotonic() + self.disk_sweep_interval
+            self._sweeping = False
+
+    def _clear_disk(self) -> None:
+        for entry in os.scandir(self.disk_path):
+            if entry.name.endswith(".json"):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def _store(self, key: str, expires_at: float, payload: str) -> None:
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        self._discard(key)
+        self._entries[key] = (expires_at, payload, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached payload for a key, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] >= time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                TOOL_RESULT_CACHE_LOOKUPS.inc(result="hit")
+                return entry[1]
+            self._discard(key)
+        if self.disk_path:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self._store(key, *entry)
+                self.disk_hits += 1
+                TOOL_RESULT_CACHE_LOOKUPS.inc(result="disk_hit")
+                return entry[1]
+        self.misses += 1
+        TOOL_RESULT_CACHE_LOOKUPS.inc(result="miss")
+        return None
+
+    async def put(self, key: str, payload: str, ttl: float) -> None:
+        """Cache a payload for ``ttl`` seconds."""
+        expires_at = time.time() + ttl
+        self._store(key, expires_at, payload)
+        if self.disk_path:
+            await asyncio.to_thread(self._write_disk, key, expires_at, payload)
+            self._disk_bytes += len(payload.encode("utf-8"))
+            await self._maybe_sweep_disk()
+
+    async def clear(self) -> None:
+        """Drop every cached entry, in memory and on disk."""
+        self._entries.clear()
+        self._bytes = 0
+        if self.disk_path:
+            await asyncio.to_thread(self._clear_disk)
+            self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
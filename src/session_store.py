@@ -0,0 +1,331 @@
+"""
+Session store module for CPT Inspector.
+
+Provides pluggable chat history storage: a bounded in-memory backend and a
+SQLite backend that several worker processes can share.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger("cpt-inspector.sessions")
+
+
+def turn_cutoff(roles: List[Optional[str]], max_messages: int) -> int:
+    """Return how many leading messages to drop to keep at most ``max_messages``.
+
+    History is only cut before a ``user`` message, so whole turns are dropped,
+    oldest first, and no tool result is kept without the call that asked for
+    it. A latest turn longer than the limit is kept whole.
+    """
+    excess = len(roles) - max_messages
+    if not max_messages or excess <= 0:
+        return 0
+    turn_starts = [i for i, role in enumerate(roles) if role == "user"]
+    for start in turn_starts:
+        if start >= excess:
+            return start
+    return turn_starts[-1] if turn_starts else 0
+
+
+class SessionStore(ABC):
+    """Abstract base class for chat session stores."""
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Return a copy of the session's messages, or None if it does not exist."""
+        pass
+
+    @abstractmethod
+    async def append(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Append messages to a session, creating it if needed."""
+        pass
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> bool:
+        """Delete a session and return whether it existed."""
+        pass
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Return the number of stored sessions."""
+        pass
+
+    @asynccontextmanager
+    async def lease(self, session_id: str) -> AsyncIterator[None]:
+        """Hold a session exclusively for one turn, across every process sharing the store.
+
+        Admission control already runs a session's turns one at a time within
+        a process, so stores that a single process owns need nothing more.
+        """
+        yield
+
+
+class MemorySessionStore(SessionStore):
+    """In-process session store with LRU eviction and idle expiry."""
+
+    def __init__(self, config: Dict[str, Any]):
+        """Initialize the store with size and TTL limits from configuration."""
+        self.max_sessions = config.get("max_sessions", 1000)
+        self.max_messages = config.get("max_messages", 500)
+        self.ttl = config.get("ttl", 86400)
+        self._sessions: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+
+    def _expire(self) -> None:
+        """Drop sessions idle for longer than the TTL."""
+        if not self.ttl:
+            return
+        cutoff = time.monotonic() - self.ttl
+        # Sessions are kept in access order, so expired ones are at the front
+        while self._sessions:
+            session_id = next(iter(self._sessions))
+            if self._last_access[session_id] >= cutoff:
+                break
+            self._drop(session_id)
+
+    def _drop(self, session_id: str) -> None:
+        del self._sessions[session_id]
+        del self._last_access[session_id]
+
+    def _touch(self, session_id: str) -> None:
+        self._sessions.move_to_end(session_id)
+        self._last_access[session_id] = time.monotonic()
+
+    async def get(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Return a copy of the session's messages, or None if it does not exist."""
+        self._expire()
+        if session_id not in self._sessions:
+            return None
+        self._touch(session_id)
+        return list(self._sessions[session_id])
+
+    async def append(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Append messages to a session, creating it and evicting the LRU session if needed."""
+        self._expire()
+        history = self._sessions.setdefault(session_id, [])
+        history.extend(messages)
+        cutoff = turn_cutoff([message.get("role") for message in history], self.max_messages)
+        if cutoff:
+            del history[:cutoff]
+        self._touch(session_id)
+        while self.max_sessions and len(self._sessions) > self.max_sessions:
+            evicted = next(iter(self._sessions))
+            logger.info("Evicting least recently used session %s", evicted)
+            self._drop(evicted)
+
+    async def delete(self, session_id: str) -> bool:
+        """Delete a session and return whether it existed."""
+        if session_id not in self._sessions:
+            return False
+        self._drop(session_id)
+        return True
+
+    async def count(self) -> int:
+        """Return the number of stored sessions."""
+        self._expire()
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite-backed session store in WAL mode, shareable across worker processes.
+
+    Messages are stored one row each so a turn only inserts the new messages.
+    A session's turns are serialized across processes by a lease row that
+    lapses after ``lease`` seconds unless renewed, so a crashed worker cannot
+    hold a session forever. Blocking SQLite calls run in a worker thread to
+    keep the event loop free.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """Open (and create if needed) the SQLite database from configuration."""
+        self.path = config.get("path", "data/sessions.db")
+        self.ttl = config.get("ttl", 86400)
+        self.max_messages = config.get("max_messages", 500)
+        self.lease_seconds = config.get("lease", 30)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                message TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS session_leases (
+                session_id TEXT PRIMARY KEY,
+                token TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+            CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at);
+        """)
+        self._conn.commit()
+        logger.info("SQLite session store opened at %s", self.path)
+
+    def _expire(self) -> None:
+        if not self.ttl:
+            return
+        cutoff = time.time() - self.ttl
+        self._conn.execute(
+            "DELETE FROM messages WHERE session_id IN "
+            "(SELECT session_id FROM sessions WHERE updated_at < ?)", (cutoff,)
+        )
+        self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+
+    def _get(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None or (self.ttl and row[0] < time.time() - self.ttl):
+                return None
+            rows = self._conn.execute(
+                "SELECT message FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+        return [json.loads(message) for (message,) in rows]
+
+    def _append(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        payloads = [(session_id, json.dumps(message, default=str)) for message in messages]
+        with self._lock, self._conn:
+            self._expire()
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, updated_at) VALUES (?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+                (session_id, time.time()),
+            )
+            self._conn.executemany(
+                "INSERT INTO messages (session_id, message) VALUES (?, ?)", payloads
+            )
+            if self.max_messages:
+                self._trim(session_id)
+
+    def _trim(self, session_id: str) -> None:
+        count = self._conn.execute(
+            "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+        ).fetchone()[0]
+        if count <= self.max_messages:
+            return
+        rows = self._conn.execute(
+            "SELECT id, json_extract(message, '$.role') FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+        ).fetchall()
+        cutoff = turn_cutoff([role for _, role in rows], self.max_messages)
+        if cutoff:
+            self._conn.execute(
+                "DELETE FROM messages WHERE session_id = ? AND id < ?", (session_id, rows[cutoff][0])
+            )
+
+    def _delete(self, session_id: str) -> bool:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            cursor = self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            return cursor.rowcount > 0
+
+    def _count(self) -> int:
+        with self._lock:
+            cutoff = time.time() - self.ttl if self.ttl else 0
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE updated_at >= ?", (cutoff,)
+            ).fetchone()[0]
+
+    def _acquire(self, session_id: str, token: str) -> bool:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO session_leases (session_id, token, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at "
+                "WHERE session_leases.expires_at < ?",
+                (session_id, token, now + self.lease_seconds, now),
+            )
+            row = self._conn.execute(
+                "SELECT token FROM session_leases WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            return row is not None and row[0] == token
+
+    def _renew(self, session_id: str, token: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE session_leases SET expires_at = ? WHERE session_id = ? AND token = ?",
+                (time.time() + self.lease_seconds, session_id, token),
+            )
+
+    def _release(self, session_id: str, token: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM session_leases WHERE session_id = ? AND token = ?", (session_id, token)
+            )
+
+    async def _keep_lease(self, session_id: str, token: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self._renew, session_id, token)
+            except sqlite3.Error as e:
+                logger.error("Renewing the lease on session %s failed: %s", session_id, e)
+
+    @asynccontextmanager
+    async def lease(self, session_id: str) -> AsyncIterator[None]:
+        """Wait until no other process is running a turn for the session, then hold it."""
+        token = uuid.uuid4().hex
+        delay = 0.05
+        waited = False
+        while not await asyncio.to_thread(self._acquire, session_id, token):
+            if not waited:
+                logger.info("Waiting for another worker to finish a turn for session %s", session_id)
+                waited = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+        renewer = asyncio.create_task(self._keep_lease(session_id, token))
+        try:
+            yield
+        finally:
+            renewer.cancel()
+            await asyncio.to_thread(self._release, session_id, token)
+
+    async def get(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the session's messages, or None if it does not exist."""
+        return await asyncio.to_thread(self._get, session_id)
+
+    async def append(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Insert only the new messages for a session, creating it if needed."""
+        await asyncio.to_thread(self._append, session_id, messages)
+
+    async def delete(self, session_id: str) -> bool:
+        """Delete a session and return whether it existed."""
+        return await asyncio.to_thread(self._delete, session_id)
+
+    async def count(self) -> int:
+        """Return the number of live sessions."""
+        return await asyncio.to_thread(self._count)
+
+
+class SessionStoreFactory:
+    """Factory for creating session stores."""
+    @staticmethod
+    def create_store(config: Dict[str, Any]) -> SessionStore:
+        """Create the session store selected by the ``backend`` key."""
+        backend = config.get("backend", "memory")
+        if backend == "memory":
+            return MemorySessionStore(config)
+        elif backend == "sqlite":
+            return SQLiteSessionStore(config)
+        else:
+            raise ValueError(f"Unsupported session store backend: {backend}")
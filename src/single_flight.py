@@ -0,0 +1,69 @@
+"""
+Single-flight module for CPT Inspector.
+
+Lets concurrent identical requests share one in-flight call instead of each
+hitting the backend.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from src.metrics import COALESCED_REQUESTS
+from src.tracing import tracer
+
+logger = logging.getLogger("cpt-inspector.single-flight")
+
+
+class _Call:
+    """An in-flight call and the number of callers waiting on it."""
+
+    def __init__(self, task: "asyncio.Task"):
+        """Wrap a running call with no waiters yet."""
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The call runs in its own task, so a caller that goes away does not cancel
+    it for the others; it is cancelled only once every caller has gone.
+    """
+
+    def __init__(self, kind: str):
+        """Initialize an empty group; ``kind`` labels the coalescing metric."""
+        self.kind = kind
+        self._calls: Dict[str, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of ``factory()``, sharing it with concurrent callers of ``key``."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            logger.debug("Coalescing %s request %s onto an in-flight call", self.kind, key[:12])
+            COALESCED_REQUESTS.inc(kind=self.kind)
+            tracer.annotate(coalesced=True)
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to use the result; new callers start afresh
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Retrieve the exception so an abandoned call is not reported as unhandled
+        if not call.task.cancelled():
+            call.task.exception()
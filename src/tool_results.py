@@ -0,0 +1,247 @@
+"""
+Tool result compaction module for CPT Inspector.
+
+Turns raw MCP tool results into compact text before they are fed back to
+the model: content is extracted from the result envelope, oversized results
+are summarized within a per-tool budget, and the full text is kept in a
+bounded store so it can still be read by reference.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("cpt-inspector.tool-results")
+
+READ_TOOL_RESULT = "read_tool_result"
+
+# Rows inspected when computing column statistics
+MAX_STAT_ROWS = 100000
+
+
+def extract_text(result: Any) -> str:
+    """Return the model-facing text of a tool result.
+
+    Text content items are joined; structured content is used when a result
+    has no text. Error results are prefixed with ``Error:``.
+    """
+    if isinstance(result, dict) and "error" in result:
+        return f"Error: {result['error']}"
+    content = getattr(result, "content", None)
+    if content is None:
+        return result if isinstance(result, str) else str(result)
+    parts: List[str] = []
+    for item in content:
+        kind = getattr(item, "type", None)
+        if kind == "text":
+            parts.append(item.text)
+        elif kind == "resource":
+            resource = item.resource
+            parts.append(getattr(resource, "text", None) or f"[resource {resource.uri}]")
+        elif kind == "resource_link":
+            parts.append(f"[resource {item.uri}]")
+        else:
+            parts.append(f"[{kind} content, {getattr(item, 'mimeType', 'unknown type')}]")
+    text = "\n".join(parts)
+    structured = getattr(result, "structuredContent", None)
+    if not text and structured is not None:
+        text = json.dumps(structured, default=str)
+    if getattr(result, "isError", False):
+        return f"Error: {text}"
+    return text
+
+
+def find_table(data: Any) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+    """Return ``(name, rows)`` for the largest list of objects in parsed JSON, if any."""
+    if isinstance(data, list):
+        if data and all(isinstance(row, dict) for row in data[:50]):
+            return "rows", [row for row in data if isinstance(row, dict)]
+        return None
+    if isinstance(data, dict):
+        tables = [
+            (key, value) for key, value in data.items()
+            if isinstance(value, list) and value and all(isinstance(row, dict) for row in value[:50])
+        ]
+        if tables:
+            key, rows = max(tables, key=lambda table: len(table[1]))
+            return key, [row for row in rows if isinstance(row, dict)]
+    return None
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:.4g}"
+
+
+def column_stats(rows: List[Dict[str, Any]]) -> List[str]:
+    """Describe each column: numeric range and mean, or distinct and most common values."""
+    columns: Dict[str, List[Any]] = OrderedDict()
+    for row in rows[:MAX_STAT_ROWS]:
+        for key, value in row.items():
+            columns.setdefault(key, []).append(value)
+    lines = []
+    for name, values in columns.items():
+        present = [value for value in values if value is not None]
+        numbers = [value for value in present if isinstance(value, (int, float)) and not isinstance(value, bool)]
+        if present and len(numbers) == len(present):
+            lines.append(
+                f"- {name}: number, min {_format_number(min(numbers))}, max {_format_number(max(numbers))}, "
+                f"mean {_format_number(sum(numbers) / len(numbers))}"
+            )
+            continue
+        counts = Counter(json.dumps(value, default=str) if isinstance(value, (dict, list)) else str(value) for value in present)
+        top = ", ".join(f"{value[:60]} ({count})" for value, count in counts.most_common(3))
+        missing = f", {len(values) - len(present)} null" if len(present) < len(values) else ""
+        lines.append(f"- {name}: {len(counts)} distinct{missing}; most common: {top}")
+    return lines
+
+
+class ToolResultStore:
+    """Byte-bounded LRU of full tool results, addressed by content-derived refs."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """Initialize an empty store."""
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+
+    def put(self, text: str) -> str:
+        """Store a result and return its ref."""
+        ref = "tr_" + hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        if ref in self._entries:
+            self._entries.move_to_end(ref)
+            return ref
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return ref
+        self._entries[ref] = text
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.encode("utf-8"))
+        return ref
+
+    def get(self, ref: str) -> Optional[str]:
+        """Return a stored result, or None if it was never stored or has been evicted."""
+        text = self._entries.get(ref)
+        if text is not None:
+            self._entries.move_to_end(ref)
+        return text
+
+
+class ToolResultCompactor:
+    """Fits tool results into per-tool character budgets.
+
+    Results within budget are passed through as extracted text. Larger
+    tabular JSON is summarized as column statistics plus the first rows;
+    other text keeps its head and tail. Either way the full text is stored
+    and the summary names the ref to read it with ``read_tool_result``.
+    """
+
+    def __init__(
+        self,
+        max_chars: int = 4000,
+        budgets: Optional[Dict[str, int]] = None,
+        top_rows: int = 5,
+        store: Optional[ToolResultStore] = None,
+    ):
+        """Initialize the compactor; ``budgets`` overrides ``max_chars`` per server-side tool name (0 disables compaction)."""
+        self.max_chars = max_chars
+        self.budgets = budgets or {}
+        self.top_rows = top_rows
+        self.store = store or ToolResultStore()
+
+    def budget(self, tool_name: str) -> int:
+        """Return the character budget for a tool."""
+        return self.budgets.get(tool_name, self.max_chars)
+
+    async def compact(self, tool_name: str, result: Any, budget_name: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """Return the text to feed back to the model and the ref of the full result, if it was stored.
+
+        ``tool_name`` is the name the model called; the budget is looked up
+        by ``budget_name``, the tool's name on its server, when given.
+        Extraction and summarizing run in a worker thread so large results
+        do not block the event loop.
+        """
+        budget = self.budget(budget_name or tool_name)
+        text, summary = await asyncio.to_thread(self._prepare, result, budget)
+        if summary is None:
+            return text, None
+        ref = self.store.put(text)
+        footer = (
+            f"\n[{tool_name} returned {len(text)} characters; this is a summary. "
+            f"Call {READ_TOOL_RESULT} with ref \"{ref}\" and an offset to read the full result.]"
+        )
+        logger.debug("Compacted %s result from %d to %d chars (%s)", tool_name, len(text), len(summary), ref)
+        return summary + footer, ref
+
+    def _prepare(self, result: Any, budget: int) -> Tuple[str, Optional[str]]:
+        """Return the extracted text and its summary, or None when it fits the budget."""
+        text = extract_text(result)
+        if not budget or len(text) <= budget:
+            return text, None
+        return text, self._summarize(text, budget)
+
+    def _summarize(self, text: str, budget: int) -> str:
+        stripped = text.lstrip()
+        table = None
+        if stripped[:1] in ("[", "{"):
+            try:
+                table = find_table(json.loads(text))
+            except ValueError:
+                table = None
+        if table is not None:
+            name, rows = table
+            lines = [f"Table \"{name}\": {len(rows)} rows", "Columns:"]
+            lines.extend(column_stats(rows))
+            lines.append(f"First {min(self.top_rows, len(rows))} rows:")
+            lines.extend(json.dumps(row, default=str) for row in rows[:self.top_rows])
+            summary = "\n".join(lines)
+            if len(summary) <= budget:
+                return summary
+            return summary[:budget] + "\n[...]"
+        head = int(budget * 0.7)
+        tail = budget - head
+        return f"{text[:head]}\n[... {len(text) - head - tail} characters omitted ...]\n{text[-tail:]}"
+
+    def read(self, ref: str, offset: Any = 0, length: Any = None) -> str:
+        """Return a slice of a stored result for the ``read_tool_result`` tool.
+
+        ``offset`` and ``length`` come from the model, so they are clamped to
+        the stored text and to ``max_chars``; invalid values get an error.
+        """
+        text = self.store.get(ref)
+        if text is None:
+            return f"Error: no stored tool result with ref '{ref}'"
+        try:
+            offset = int(offset or 0)
+            length = int(length or self.max_chars or len(text))
+        except (TypeError, ValueError):
+            return f"Error: offset and length must be integers, got offset={offset!r} and length={length!r}"
+        offset = min(max(offset, 0), len(text))
+        length = min(max(length, 1), self.max_chars or len(text))
+        chunk = text[offset:offset + length]
+        end = offset + len(chunk)
+        more = f" Call again with offset {end} for more." if end < len(text) else ""
+        return f"{chunk}\n[Characters {offset}-{end} of {len(text)}.{more}]"
+
+    def tool_spec(self) -> Dict[str, Any]:
+        """Return the ``read_tool_result`` tool definition in Ollama's format."""
+        return {
+            "type": "function",
+            "function": {
+                "name": READ_TOOL_RESULT,
+                "description": "Read part of a large tool result that was summarized, using the ref given in the summary.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "ref": {"type": "string", "description": "Ref of the stored result"},
+                        "offset": {"type": "integer", "description": "Character offset to start reading at"},
+                        "length": {"type": "integer", "description": f"Characters to read, at most {self.max_chars}"},
+                    },
+                    "required": ["ref"],
+                },
+            },
+        }
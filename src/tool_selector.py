@@ -0,0 +1,165 @@
+"""
+Tool selector module for CPT Inspector.
+
+Picks the tools most relevant to a prompt so the model is not sent every
+tool schema on every round. Tools are ranked by Ollama embeddings when an
+embedding model is configured, and by BM25 over names and descriptions
+otherwise or when embedding fails.
+"""
+
+import hashlib
+import logging
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("cpt-inspector.tool-selector")
+
+# Seconds to stay on BM25 after an embedding request fails
+EMBEDDING_RETRY_SECONDS = 60.0
+
+EmbedFunction = Callable[[str, List[str]], Awaitable[List[List[float]]]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens, breaking up snake_case and camelCase."""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    return [token for token in re.split(r"[^a-z0-9]+", text.lower()) if len(token) > 1]
+
+
+def tool_document(tool: Dict[str, Any]) -> str:
+    """Return the text a tool is indexed by: its name, description and parameter names."""
+    function = tool.get("function", {})
+    parameters = (function.get("parameters") or {}).get("properties") or {}
+    parts = [function.get("name", ""), function.get("description") or ""]
+    for name, schema in parameters.items():
+        parts.append(name)
+        if isinstance(schema, dict) and schema.get("description"):
+            parts.append(schema["description"])
+    return "\n".join(parts)
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of documents."""
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        """Index the documents."""
+        self.k1 = k1
+        self.b = b
+        self.terms = [Counter(tokenize(document)) for document in documents]
+        self.lengths = [sum(terms.values()) for terms in self.terms]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        frequencies: Counter = Counter()
+        for terms in self.terms:
+            frequencies.update(terms.keys())
+        count = len(self.terms)
+        self.idf = {term: math.log(1 + (count - df + 0.5) / (df + 0.5)) for term, df in frequencies.items()}
+
+    def scores(self, query: str) -> List[float]:
+        """Score every document against a query."""
+        query_terms = set(tokenize(query))
+        results = []
+        for terms, length in zip(self.terms, self.lengths):
+            score = 0.0
+            for term in query_terms:
+                frequency = terms.get(term)
+                if not frequency:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+                score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            results.append(score)
+        return results
+
+
+def cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    """Return the cosine similarity of two vectors."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ToolSelector:
+    """Ranks tools against a prompt and returns the ``top_k`` most relevant.
+
+    Embeddings are cached by model and text, so each tool is embedded once
+    until its description changes. The BM25 index is rebuilt only when the
+    tool set changes.
+    """
+
+    def __init__(
+        self,
+        top_k: int = 8,
+        embedding_model: Optional[str] = None,
+        embed: Optional[EmbedFunction] = None,
+        cache_size: int = 4096,
+    ):
+        """Initialize the selector; ``embed(model, texts)`` returns one vector per text."""
+        self.top_k = top_k
+        self.embedding_model = embedding_model
+        self.embed = embed
+        self.cache_size = cache_size
+        self._vectors: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._bm25: Optional[Tuple[Tuple[str, ...], BM25Index]] = None
+        self._embedding_failed_at = 0.0
+
+    def enabled_for(self, tools: List[Dict[str, Any]]) -> bool:
+        """Return True if ``tools`` is large enough to be narrowed down."""
+        return 0 < self.top_k < len(tools)
+
+    async def select(self, query: str, tools: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], str]:
+        """Return the most relevant tools in catalog order and the method used to rank them.
+
+        The method is ``embedding``, ``bm25``, or ``all`` when the tool set is
+        small enough or nothing in the prompt matched.
+        """
+        if not self.enabled_for(tools) or not query.strip():
+            return tools, "all"
+        documents = [tool_document(tool) for tool in tools]
+        scores: Optional[List[float]] = None
+        method = "embedding"
+        if self.embedding_model and self.embed and time.monotonic() - self._embedding_failed_at >= EMBEDDING_RETRY_SECONDS:
+            try:
+                vectors = await self._embed([query] + documents)
+                scores = [cosine(vectors[0], vector) for vector in vectors[1:]]
+            except Exception as e:
+                self._embedding_failed_at = time.monotonic()
+                logger.warning("Tool embedding failed, using BM25 for %ss: %s", EMBEDDING_RETRY_SECONDS, e)
+        if scores is None:
+            method = "bm25"
+            scores = self._bm25_index(documents).scores(query)
+            if not any(scores):
+                return tools, "all"
+        ranked = sorted(range(len(tools)), key=lambda i: scores[i], reverse=True)[:self.top_k]
+        if method == "bm25":
+            # Tools sharing no words with the prompt are no better than any other
+            ranked = [i for i in ranked if scores[i] > 0]
+        return [tools[i] for i in sorted(ranked)], method
+
+    def _bm25_index(self, documents: List[str]) -> BM25Index:
+        key = tuple(documents)
+        if self._bm25 is None or self._bm25[0] != key:
+            self._bm25 = (key, BM25Index(documents))
+        return self._bm25[1]
+
+    def _cache_key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.embedding_model}\0{text}".encode("utf-8")).hexdigest()
+
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Return embeddings for ``texts``, requesting only the ones not cached."""
+        keys = [self._cache_key(text) for text in texts]
+        missing = [i for i, key in enumerate(keys) if key not in self._vectors]
+        if missing:
+            vectors = await self.embed(self.embedding_model, [texts[i] for i in missing])
+            if len(vectors) != len(missing):
+                raise ValueError(f"expected {len(missing)} embeddings, got {len(vectors)}")
+            for i, vector in zip(missing, vectors):
+                self._vectors[keys[i]] = list(vector)
+        result = []
+        for key in keys:
+            self._vectors.move_to_end(key)
+            result.append(self._vectors[key])
+        while len(self._vectors) > self.cache_size:
+            self._vectors.popitem(last=False)
+        return result
@@ -0,0 +1,219 @@
+"""
+Tracing module for CPT Inspector.
+
+Lightweight span instrumentation for chat turns. Finished traces are kept
+in a bounded ring buffer and can optionally be appended to a file as
+OTLP-compatible JSON.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("cpt-inspector.tracing")
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        """Start a span now."""
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        """Add or overwrite span attributes."""
+        self.attributes.update(attributes)
+
+    def end(self) -> None:
+        """Mark the span as finished."""
+        self.end_ns = time.time_ns()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the span with times relative to the trace start."""
+        end_ns = self.end_ns or time.time_ns()
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_offset_ms": round((self.start_ns - self.trace.start_ns) / 1e6, 3),
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stand-in used when no trace is active."""
+
+    def set(self, **attributes: Any) -> None:
+        """Ignore attributes."""
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("cpt_inspector_current_span", default=None)
+
+
+def _reset(token: Any) -> None:
+    # Async generators finalized by the event loop run in a fresh context
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        pass
+
+
+class Trace:
+    """All spans recorded for one chat turn."""
+
+    def __init__(self, name: str, session_id: str):
+        """Create an empty trace."""
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.session_id = session_id
+        self.start_ns = time.time_ns()
+        self.spans: List[Span] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the trace as a timeline of spans."""
+        root = self.spans[0] if self.spans else None
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "session_id": self.session_id,
+            "start": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.start_ns / 1e9)),
+            "duration_ms": root.to_dict()["duration_ms"] if root else 0,
+            "spans": [span.to_dict() for span in sorted(self.spans, key=lambda span: span.start_ns)],
+        }
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Tracer:
+    """Records spans for chat turns into a bounded ring buffer."""
+
+    def __init__(self, max_traces: int = 200, otlp_file: Optional[str] = None):
+        """Initialize the tracer; ``otlp_file`` enables OTLP JSON export."""
+        self.traces: Deque[Trace] = deque(maxlen=max_traces)
+        self._export_lock = threading.Lock()
+        self.configure(max_traces, otlp_file)
+
+    def configure(self, max_traces: int = 200, otlp_file: Optional[str] = None) -> None:
+        """Resize the ring buffer and set the export file."""
+        self.traces = deque(self.traces, maxlen=max_traces)
+        self.otlp_file = otlp_file
+        if otlp_file and os.path.dirname(otlp_file):
+            os.makedirs(os.path.dirname(otlp_file), exist_ok=True)
+
+    @contextmanager
+    def trace(self, name: str, session_id: str, **attributes: Any) -> Iterator[Span]:
+        """Start a new trace whose root span covers the ``with`` block."""
+        trace = Trace(name, session_id)
+        root = Span(trace, name, None, attributes)
+        trace.spans.append(root)
+        token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            root.end()
+            _reset(token)
+            self.traces.append(trace)
+            if self.otlp_file:
+                self._schedule_export(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Any]:
+        """Record a child of the current span; a no-op outside of a trace."""
+        parent = _current_span.get()
+        if parent is None:
+            yield NOOP_SPAN
+            return
+        span = Span(parent.trace, name, parent.span_id, attributes)
+        parent.trace.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end()
+            _reset(token)
+
+    def annotate(self, **attributes: Any) -> None:
+        """Set attributes on the current span, if any."""
+        span = _current_span.get()
+        if span is not None:
+            span.set(**attributes)
+
+    def traces_for(self, session_id: str) -> List[Dict[str, Any]]:
+        """Return the buffered traces of one session, oldest first."""
+        return [trace.to_dict() for trace in list(self.traces) if trace.session_id == session_id]
+
+    def _schedule_export(self, trace: Trace) -> None:
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self._export, trace)
+        except RuntimeError:
+            self._export(trace)
+
+    def _export(self, trace: Trace) -> None:
+        """Append a trace to the export file as one OTLP/JSON ``ExportTraceServiceRequest``."""
+        spans = []
+        for span in trace.spans:
+            otlp_span = {
+                "traceId": trace.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                "attributes": [
+                    {"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()
+                ],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            spans.append(otlp_span)
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": "cpt-inspector"}},
+                    {"key": "session.id", "value": {"stringValue": trace.session_id}},
+                ]},
+                "scopeSpans": [{"scope": {"name": "cpt-inspector"}, "spans": spans}],
+            }]
+        }
+        try:
+            with self._export_lock, open(self.otlp_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(request) + "\n")
+        except OSError as e:
+            logger.warning("Failed to export trace %s: %s", trace.trace_id, e)
+
+
+tracer = Tracer()